@@ -9,10 +9,14 @@ A library to implement a leveling system into a discord bot. Contains features s
 
 """
 
-from .announcement import LevelUpAnnouncement
-from .leveling_system import DiscordLevelingSystem
-from .member_data import MemberData
-from .role_awards import RoleAward
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .announcement import LevelUpAnnouncement
+    from .leveling_system import DiscordLevelingSystem
+    from .member_data import MemberData
+    from .role_awards import RoleAward
 
 __source__ = 'https://github.com/Defxult/discordLevelingSystem'
 __all__ = (
@@ -21,3 +25,24 @@ __all__ = (
     'MemberData',
     'RoleAward'
 )
+
+# the submodule each public name lives in. They are only imported the first time the name is accessed
+_lazy_imports = {
+    'LevelUpAnnouncement' : '.announcement',
+    'DiscordLevelingSystem' : '.leveling_system',
+    'MemberData' : '.member_data',
+    'RoleAward' : '.role_awards'
+}
+
+def __getattr__(name: str):
+    try:
+        module_name = _lazy_imports[name]
+    except KeyError:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}') from None
+    else:
+        value = getattr(import_module(module_name, __name__), name)
+        globals()[name] = value
+        return value
+
+def __dir__():
+    return sorted(set(globals()) | set(_lazy_imports))
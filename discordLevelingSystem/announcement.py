@@ -22,25 +22,58 @@ FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
 DEALINGS IN THE SOFTWARE.
 """
 
-from collections.abc import Sequence
-from typing import ClassVar, Final, Optional, Union
+from __future__ import annotations
 
-from discord import AllowedMentions, Embed, Member as DMember
+import re
+import sys
+from operator import attrgetter
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any, Callable, ClassVar, Dict, Final, Iterable, List, Mapping, Optional, Pattern, Tuple, Union
 
-from .errors import DiscordLevelingSystemError
+from discord import AllowedMentions, Embed
+from discord.utils import MISSING
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+    from discord import Member as DMember
 
 default_message: Final = '[$mention], you are now **level [$level]!**'
-default_mentions: Final = AllowedMentions(everyone=False, users=True, roles=False, replied_user=False)
+_default_mentions: Optional[AllowedMentions] = None
+
+def _get_default_mentions() -> AllowedMentions:
+    """Return the :class:`discord.AllowedMentions` that is used when one wasn't specified. It's only created the first time it's needed and then reused
+
+        .. added:: v1.3.0
+    """
+    global _default_mentions
+    if _default_mentions is None:
+        _default_mentions = AllowedMentions(everyone=False, users=True, roles=False, replied_user=False)
+    return _default_mentions
 
+def __getattr__(name: str):
+    # `default_mentions` is still available from this module, it's just created the first time it's accessed
+    if name == 'default_mentions':
+        return _get_default_mentions()
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+def _compile_markdowns(markdowns: Iterable[str]) -> Pattern[str]:
+    """Compile a regex that matches any of the markdowns. The `[$` and `]` every markdown has are kept out of the alternation, so the
+    alternatives are only tried where the text contains a `[$`
+
+        .. added:: v1.3.0
+    """
+    return re.compile(r'\[\$(?:' + '|'.join(re.escape(markdown[2:-1]) for markdown in markdowns) + r')\]')
 
 class AnnouncementMemberGuild:
     """Helper class for :class:`AnnouncementMember`
     
         .. added:: v1.1.0 (moved from :class:`AnnouncementMember`, was just :class:`Guild`)
     """
-    icon_url: ClassVar[str] = '[$g_icon_url]'
-    id: ClassVar[str] = '[$g_id]'
-    name: ClassVar[str] = '[$g_name]'
+    __slots__ = ()
+
+    icon_url: ClassVar[str] = sys.intern('[$g_icon_url]')
+    id: ClassVar[str] = sys.intern('[$g_id]')
+    name: ClassVar[str] = sys.intern('[$g_name]')
 
 class AnnouncementMember:
     """Helper class for :class:`LevelUpAnnouncement`
@@ -52,21 +85,118 @@ class AnnouncementMember:
                 Added :attr:`display_avatar_url`
                 Added :attr:`banner_url`
     """
-    avatar_url: ClassVar[str] = '[$avatar_url]'
-    banner_url: ClassVar[str] = '[$banner_url]'
-    created_at: ClassVar[str] = '[$created_at]'
-    default_avatar_url: ClassVar[str] = '[$default_avatar_url]'
-    discriminator: ClassVar[str] = '[$discriminator]'
-    display_avatar_url: ClassVar[str] = '[$display_avatar_url]' # Guild avatar if they have one set
-    display_name: ClassVar[str] = '[$display_name]'
-    id: ClassVar[str] = '[$id]'
-    joined_at: ClassVar[str] = '[$joined_at]'
-    mention: ClassVar[str] = '[$mention]'
-    name: ClassVar[str] = '[$name]'
-    nick: ClassVar[str] = '[$nick]'
+    __slots__ = ()
+
+    avatar_url: ClassVar[str] = sys.intern('[$avatar_url]')
+    banner_url: ClassVar[str] = sys.intern('[$banner_url]')
+    created_at: ClassVar[str] = sys.intern('[$created_at]')
+    default_avatar_url: ClassVar[str] = sys.intern('[$default_avatar_url]')
+    discriminator: ClassVar[str] = sys.intern('[$discriminator]')
+    display_avatar_url: ClassVar[str] = sys.intern('[$display_avatar_url]') # Guild avatar if they have one set
+    display_name: ClassVar[str] = sys.intern('[$display_name]')
+    id: ClassVar[str] = sys.intern('[$id]')
+    joined_at: ClassVar[str] = sys.intern('[$joined_at]')
+    mention: ClassVar[str] = sys.intern('[$mention]')
+    name: ClassVar[str] = sys.intern('[$name]')
+    nick: ClassVar[str] = sys.intern('[$nick]')
     
     Guild: ClassVar[AnnouncementMemberGuild] = AnnouncementMemberGuild()
 
+# the function used to get the value of each :class:`AnnouncementMember` markdown from the :class:`discord.Member` that leveled up
+_member_markdowns: Final[Dict[str, Callable[[DMember], Any]]] = {
+    # member
+    AnnouncementMember.avatar_url : lambda member: member.avatar.url if member.avatar is not None else member.default_avatar.url,
+    AnnouncementMember.banner_url : lambda member: member.banner.url if member.banner is not None else member.default_avatar.url,
+    AnnouncementMember.created_at : attrgetter('created_at'),
+    AnnouncementMember.default_avatar_url : attrgetter('default_avatar.url'),
+    AnnouncementMember.discriminator : attrgetter('discriminator'),
+    AnnouncementMember.display_avatar_url : attrgetter('display_avatar.url'),
+    AnnouncementMember.display_name : attrgetter('display_name'),
+    AnnouncementMember.id : attrgetter('id'),
+    AnnouncementMember.joined_at : attrgetter('joined_at'),
+    AnnouncementMember.mention : attrgetter('mention'),
+    AnnouncementMember.name : attrgetter('name'),
+    AnnouncementMember.nick : attrgetter('nick'),
+
+    # guild
+    AnnouncementMember.Guild.icon_url : lambda member: member.guild.icon.url if member.guild.icon is not None else member.default_avatar.url,
+    AnnouncementMember.Guild.id : attrgetter('guild.id'),
+    AnnouncementMember.Guild.name : attrgetter('guild.name')
+}
+
+class _MarkdownValues(dict):
+    """The text each markdown is replaced with for a single level up announcement. The values of the :class:`AnnouncementMember` markdowns are only looked up
+    the first time they're used, then reused for the rest of the message (an embed can use the same markdown in many places)
+
+        .. added:: v1.3.0
+    """
+    __slots__ = ('_member',)
+
+    def __init__(self, announcement: LevelUpAnnouncement, member: DMember):
+        super().__init__({
+            LevelUpAnnouncement.TOTAL_XP : str(announcement._total_xp),
+            LevelUpAnnouncement.LEVEL : str(announcement._level),
+            LevelUpAnnouncement.RANK : str(announcement._rank)
+        })
+        self._member = member
+    
+    def __missing__(self, markdown: str) -> str:
+        value = self[markdown] = str(_member_markdowns[markdown](self._member))
+        return value
+
+class _EmbedTemplate:
+    """The text of an embed announcement that contains a markdown. It's created the first time the embed is announced so the whole embed
+    doesn't have to be walked again for every level up
+
+        .. added:: v1.3.0
+    """
+    __slots__ = ('embed', 'embed_dict', 'copy_keys', 'markdowns')
+
+    def __init__(self, embed: Embed):
+        self.embed = embed
+        self.embed_dict = embed.to_dict()
+        self.copy_keys: List[str] = [] # footer, author, fields, etc. that contain a markdown. They're copied before the markdowns in them are replaced
+        self.markdowns: List[Tuple[tuple, str]] = [] # the path to each text that contains a markdown, and the text itself
+        for key, value in self.embed_dict.items():
+            # description, title, etc...
+            if isinstance(value, str):
+                if '[$' in value:
+                    self.markdowns.append(((key,), value))
+                continue
+            
+            # footer, author, etc...
+            elif isinstance(value, dict):
+                found = [((key, k), v) for k, v in value.items() if isinstance(v, str) and '[$' in v]
+            
+            # fields
+            elif isinstance(value, list):
+                found = [((key, index, k), v) for index, item in enumerate(value) for k, v in item.items() if isinstance(v, str) and '[$' in v]
+            
+            # discord.Color, etc...
+            else:
+                continue
+
+            if found:
+                self.copy_keys.append(key)
+                self.markdowns.extend(found)
+    
+    def render(self, convert: Callable[[str], str]) -> Embed:
+        """Return a new :class:`discord.Embed` with every text that contains a markdown passed through `convert`. Everything else is shared with the original embed (it's never modified)"""
+        if not self.markdowns:
+            return self.embed
+        
+        new_dict_embed = self.embed_dict.copy()
+        for key in self.copy_keys:
+            value = new_dict_embed[key]
+            new_dict_embed[key] = [item.copy() for item in value] if isinstance(value, list) else value.copy()
+        
+        for path, text in self.markdowns:
+            target = new_dict_embed
+            for key in path[:-1]:
+                target = target[key]
+            target[path[-1]] = convert(text)
+        return Embed.from_dict(new_dict_embed)
+
 class LevelUpAnnouncement:
     """A helper class for setting up messages that are sent when someone levels up
     
@@ -131,74 +261,67 @@ class LevelUpAnnouncement:
                 Removed :attr:`LevelUpAnnouncement.AUTHOR_MENTION`
                 Removed :attr:`LevelUpAnnouncement.XP`
                 Added :attr:`LevelUpAnnouncement.Member`
+            v1.3.0
+                The default :class:`discord.AllowedMentions` (`default_mentions`) is only created the first time it's needed
+                Added `__slots__`. Instances that use the default send options now share them
+                The send options are now read-only
+                An embed message is read the first time it's announced. To change it afterwards, set :attr:`message` to a new embed instead of editing the current one
     """
-    
-    TOTAL_XP: ClassVar[str] = '[$total_xp]'
-    LEVEL: ClassVar[str] = '[$level]'
-    RANK: ClassVar[str] = '[$rank]'
+    __slots__ = ('message', 'level_up_channel_ids', '_total_xp', '_level', '_rank', '_send_kwargs', '_embed_template')
+
+    TOTAL_XP: ClassVar[str] = sys.intern('[$total_xp]')
+    LEVEL: ClassVar[str] = sys.intern('[$level]')
+    RANK: ClassVar[str] = sys.intern('[$rank]')
     Member: ClassVar[AnnouncementMember] = AnnouncementMember()
 
-    def __init__(self, message: Union[str, Embed]=default_message, level_up_channel_ids: Optional[Sequence[int]]=None, allowed_mentions: AllowedMentions=default_mentions, tts: bool=False, delete_after: Optional[float]=None):
+    _markdown_pattern: ClassVar[Pattern[str]] = _compile_markdowns((TOTAL_XP, LEVEL, RANK, *_member_markdowns))
+
+    # shared by every instance that uses the default send options. It's only created the first time it's needed
+    _default_send_kwargs: ClassVar[Optional[Mapping[str, Any]]] = None
+
+    def __init__(self, message: Union[str, Embed]=default_message, level_up_channel_ids: Optional[Sequence[int]]=None, allowed_mentions: AllowedMentions=MISSING, tts: bool=False, delete_after: Optional[float]=None):
         self.message = message
         self.level_up_channel_ids = level_up_channel_ids
         self._total_xp: Optional[int] = None
         self._level: Optional[int] = None
         self._rank: Optional[int] = None
-        self._send_kwargs = {
-            'allowed_mentions' : allowed_mentions,
-            'tts' : tts,
-            'delete_after' : delete_after
-        }
+        self._embed_template: Optional[_EmbedTemplate] = None
+        # `allowed_mentions` is MISSING when it wasn't given (uses `default_mentions`). If it was explicitly set to :class:`None`, that's passed on so the clients default is used
+        if allowed_mentions is MISSING and tts is False and delete_after is None:
+            self._send_kwargs = LevelUpAnnouncement._get_default_send_kwargs()
+        else:
+            self._send_kwargs: Mapping[str, Any] = MappingProxyType({
+                'allowed_mentions' : _get_default_mentions() if allowed_mentions is MISSING else allowed_mentions,
+                'tts' : tts,
+                'delete_after' : delete_after
+            })
     
-    def _convert_markdown(self, to_convert: str) -> str:
-        """Convert the markdown text to the value it represents
+    @classmethod
+    def _get_default_send_kwargs(cls) -> Mapping[str, Any]:
+        """Return the read-only keyword arguments for :meth:`discord.abc.Messageable.send` that are used when all of the send options were left as their defaults
 
-            .. added:: v0.0.2
+            .. added:: v1.3.0
         """
-        markdowns = {
-            LevelUpAnnouncement.TOTAL_XP : self._total_xp,
-            LevelUpAnnouncement.LEVEL : self._level,
-            LevelUpAnnouncement.RANK : self._rank
-        }
-        for mrkd, value in markdowns.items():
-            to_convert = to_convert.replace(mrkd, str(value))
-        return to_convert
+        if cls._default_send_kwargs is None:
+            cls._default_send_kwargs = MappingProxyType({
+                'allowed_mentions' : _get_default_mentions(),
+                'tts' : False,
+                'delete_after' : None
+            })
+        return cls._default_send_kwargs
     
-    def _convert_member_markdown(self, to_convert: str, message_author: DMember) -> str:
-        """Convert the member markdown text to the value it represents
+    def _convert_markdown(self, to_convert: str, markdowns: _MarkdownValues) -> str:
+        """Convert the markdown text to the value it represents
 
             .. added:: v0.0.2
             .. changes::
-                v1.1.0
-                    Updated `discord.Member.avatar_url` -> `discord.Member.avatar.url`
-                    Updated `discord.Guild.icon_url` -> `discord.Guild.icon.url`
-                    Added `discord.Member.display_avatar.url`
-                    Added `discord.Member.banner.url`
+                v1.3.0
+                    All markdowns are now replaced in a single pass over the text
+                    Merged `_convert_member_markdown` into this method. Only the values of the markdowns that are in the text are looked up
         """
-        DEFAULT_URL = message_author.default_avatar.url
-        markdowns = {
-            # member
-            AnnouncementMember.avatar_url : message_author.avatar.url if message_author.avatar is not None else DEFAULT_URL,
-            AnnouncementMember.banner_url : message_author.banner.url if message_author.banner is not None else DEFAULT_URL,
-            AnnouncementMember.created_at : message_author.created_at,
-            AnnouncementMember.default_avatar_url : DEFAULT_URL,
-            AnnouncementMember.discriminator : message_author.discriminator,
-            AnnouncementMember.display_avatar_url : message_author.display_avatar.url,
-            AnnouncementMember.display_name : message_author.display_name,
-            AnnouncementMember.id : message_author.id,
-            AnnouncementMember.joined_at : message_author.joined_at,
-            AnnouncementMember.mention : message_author.mention,
-            AnnouncementMember.name : message_author.name,
-            AnnouncementMember.nick : message_author.nick,
-
-            # guild
-            AnnouncementMember.Guild.icon_url : message_author.guild.icon.url if message_author.guild.icon is not None else DEFAULT_URL,
-            AnnouncementMember.Guild.id : message_author.guild.id,
-            AnnouncementMember.Guild.name : message_author.guild.name
-        }
-        for mrkd, value in markdowns.items():
-            to_convert = to_convert.replace(mrkd, str(value))
-        return to_convert
+        if '[$' not in to_convert:
+            return to_convert
+        return self._markdown_pattern.sub(lambda match: markdowns[match.group()], to_convert)
     
     def _parse_message(self, message: Union[str, Embed], message_author: DMember) -> Union[str, Embed]:
         """
@@ -207,57 +330,22 @@ class LevelUpAnnouncement:
                     Added handling for embed announcements
                     Added handling for LevelUpAnnouncement.Member markdowns
                     Moved markdown conversion to its own method (`_convert_markdown`)
+                v1.3.0
+                    Messages that don't contain any markdowns are returned as is
+                    The values of the markdowns are shared between all of the text in the message
+                    The text of an embed that contains a markdown is only looked for the first time the embed is announced
         """
         if isinstance(message, str):
-            partial = self._convert_markdown(message)
-            full = self._convert_member_markdown(partial, message_author)
-            return full
+            if '[$' not in message:
+                return message
+            return self._convert_markdown(message, _MarkdownValues(self, message_author))
         
         elif isinstance(message, Embed):
-            embed = message
-            new_dict_embed = {}
-            temp_formatted = []
-
-            def e_dict_to_converted(embed_value: dict) -> dict:
-                """If the value from the :class:`discord.Embed` dictionary contains a :class:`LevelUpAnnouncement` markdown, convert the markdown to it's 
-                associated value and return it for use
-                    
-                    .. added:: v0.0.2
-                """
-                temp_dict = {}
-                for key, value in embed_value.items():
-                    if not isinstance(value, str):
-                        temp_dict[key] = value
-                    else:
-                        partial = self._convert_markdown(value)
-                        full = self._convert_member_markdown(partial, message_author)
-                        temp_dict[key] = full
-                else:
-                    return temp_dict.copy()
-
-            for embed_key, embed_value in embed.to_dict().items():
-                # description, title, etc...
-                if isinstance(embed_value, str):
-                    partial = self._convert_markdown(embed_value)
-                    full = self._convert_member_markdown(partial, message_author)
-                    new_dict_embed[embed_key] = full
-                
-                # field inline values or discord.Color
-                elif isinstance(embed_value, (int, bool)):
-                    new_dict_embed[embed_key] = embed_value
-                
-                # footer, author, etc...
-                elif isinstance(embed_value, dict):
-                    new_dict_embed[embed_key] = e_dict_to_converted(embed_value)
-                
-                # fields
-                elif isinstance(embed_value, list):
-                    for item in embed_value: # "item" is a dict
-                        temp_formatted.append(e_dict_to_converted(item))
-                    new_dict_embed[embed_key] = temp_formatted.copy()
-                    temp_formatted.clear()
-
-            return Embed.from_dict(new_dict_embed)
+            if self._embed_template is None or self._embed_template.embed is not message:
+                self._embed_template = _EmbedTemplate(message)
+            markdowns = _MarkdownValues(self, message_author)
+            return self._embed_template.render(lambda text: self._convert_markdown(text, markdowns))
 
         else:
+            from .errors import DiscordLevelingSystemError
             raise DiscordLevelingSystemError(f'Level up announcement parameter "message" expected a str or discord.Embed, got {message.__class__.__name__}')
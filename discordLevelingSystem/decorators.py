@@ -23,85 +23,93 @@ DEALINGS IN THE SOFTWARE.
 """
 
 import os
+import sqlite3
+import stat
+import warnings
 from functools import wraps
 
-import aiosqlite
-
 from .errors import DatabaseFileNotFound, ImproperLeaderboard, LeaderboardNotFound, NotConnected
 
+# the result of "PRAGMA table_info(leaderboard)" for a leaderboard table made by :meth:`DiscordLevelingSystem.create_database_file()`
+_PRAGMA_LAYOUT = (
+    (0, 'guild_id', 'INT', 1, None, 0),
+    (1, 'member_id', 'INT', 1, None, 0),
+    (2, 'member_name', 'TEXT', 1, None, 0),
+    (3, 'member_level', 'INT', 1, None, 0),
+    (4, 'member_xp', 'INT', 1, None, 0),
+    (5, 'member_total_xp', 'INT', 1, None, 0)
+)
 
-def _return_self(args: list):
-    """Return the class instance"""
-    return args[0]
+# makes looking up a member in a guild direct instead of having to go through the whole table. Database files created before v1.3.0 get it the first time they're used
+_LEADERBOARD_INDEX = 'CREATE UNIQUE INDEX IF NOT EXISTS leaderboard_member ON leaderboard (guild_id, member_id)'
 
-def db_file_exists(func):
-    """Ensure the database file exists before performing any operations"""
-    @wraps(func)
-    async def wrapper(*args, **kwargs):
-        instance = _return_self(args) # type: ignore
-        if not any([instance._database_file_path, instance._connection]):
-            raise DatabaseFileNotFound('The database file was not found. Did you forget to connect to it first using "DiscordLevelingSystem.connect_to_database_file()"?')
-        
-        def path_exists() -> bool:
-            """This is only to check if the path is :class:`None`. If it is, it raises a `TypeError`, and the traceback the user sees doesn't make any sense. This produces a cleaner
-            traceback, and if the path does exist, return `True`"""
-            nonlocal instance
-            try:
-                existence = os.path.exists(instance._database_file_path)
-            except TypeError:
-                raise NotConnected
-            else:
-                return existence
+# used instead of :var:`_LEADERBOARD_INDEX` when a database file from before v1.3.0 has more than one record for the same member in the same guild. It's removed once the unique index can be made
+_LEADERBOARD_DUPLICATES_INDEX = 'CREATE INDEX IF NOT EXISTS leaderboard_member_duplicates ON leaderboard (guild_id, member_id)'
 
-        # if it gets this far, that means :meth:`DiscordLevelingSystem.connect_to_file()` was ran, the connection
-        # object was set, the file path was stored, and that file does end in ".db". This checks it again because
-        # this check applies to various other methods that need to verify that the file exists. Using :meth:`DiscordLevelingSystem.connect_to_file()`
-        # has its own check just like this, and that method will only be called to setup the initial connection
-        if path_exists():
-            if os.path.isfile(instance._database_file_path) and instance._database_file_path.endswith('.db'):
-                return await func(*args, **kwargs)
-            else:
-                raise DatabaseFileNotFound('A file ending with ".db" was not found')
-        else:
-            raise DatabaseFileNotFound(f'The file {instance._database_file_path!r} does not exist')
-    return wrapper
+# keeps the records of each guild ordered by total XP so ranks can be counted straight from the index. Added the same way as :var:`_LEADERBOARD_INDEX`
+_RANK_INDEX = 'CREATE INDEX IF NOT EXISTS leaderboard_rank ON leaderboard (guild_id, member_total_xp DESC)'
 
-def leaderboard_exists(func):
-    """Ensures the "leaderboard" table exists in the "DiscordLevelingSystem.db" file"""
-    @wraps(func)
-    async def wrapper(*args, **kwargs):
-        instance = _return_self(args) # type: ignore
-        try:
-            async with instance._connection.execute('SELECT * FROM leaderboard'):
-                pass
-        except aiosqlite.OperationalError:
+def _verify_database_file(instance) -> None:
+    """Raise the appropriate exception if the database file the instance is connected to doesn't exist or isn't a ".db" file
+    
+        .. added:: v1.3.0
+    """
+    if not instance._database_file_path and not instance._connection:
+        raise DatabaseFileNotFound('The database file was not found. Did you forget to connect to it first using "DiscordLevelingSystem.connect_to_database_file()"?')
+    
+    # if the path is :class:`None`, `os.stat` raises `TypeError`, and the traceback the user sees doesn't make any sense. This produces a cleaner traceback
+    try:
+        file_stat = os.stat(instance._database_file_path)
+    except TypeError:
+        raise NotConnected
+    except OSError:
+        raise DatabaseFileNotFound(f'The file {instance._database_file_path!r} does not exist')
+    
+    if not (stat.S_ISREG(file_stat.st_mode) and instance._database_file_path.endswith('.db')):
+        raise DatabaseFileNotFound('A file ending with ".db" was not found')
+
+async def _verify_leaderboard(instance) -> None:
+    """Raise the appropriate exception if the "leaderboard" table doesn't exist in the database file, or if its values aren't the values needed in order to operate on said table.
+    This also adds the indexes for the members and their ranks if the table doesn't have them yet
+    
+        .. added:: v1.3.0
+    """
+    async with instance._connection.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'leaderboard' LIMIT 1") as cursor:
+        if await cursor.fetchone() is None:
             raise LeaderboardNotFound
-        else:
-            return await func(*args, **kwargs)
-    return wrapper
+    
+    current_layout = await instance._connection.execute_fetchall('PRAGMA table_info(leaderboard)')
+    if tuple(current_layout) != _PRAGMA_LAYOUT:
+        raise ImproperLeaderboard
+    
+    # older versions of the library could add a member more than once. Those files keep working so the duplicates can still be found and removed, they just can't have the unique index yet
+    # :attr:`_unique_members` tells the methods that add records whether they can rely on the unique index to handle a member being added twice at the same time
+    try:
+        await instance._connection.execute(_LEADERBOARD_INDEX)
+    except sqlite3.IntegrityError:
+        warnings.warn('The leaderboard table has more than one record for the same member in the same guild. Remove the duplicate records so each member only has one', stacklevel=3)
+        await instance._connection.execute(_LEADERBOARD_DUPLICATES_INDEX)
+        instance._unique_members = False
+    else:
+        await instance._connection.execute('DROP INDEX IF EXISTS leaderboard_member_duplicates')
+        instance._unique_members = True
+    
+    await instance._connection.execute(_RANK_INDEX)
+    await instance._connection.commit()
 
-def verify_leaderboard_integrity(func):
-    """Ensures the values of the leaderboard table are the values needed in order to operate on said table
+def db_ready(func):
+    """Ensures the database file exists, the "leaderboard" table exists in that file, and the values of the leaderboard table are the values needed in order to operate on said table.
+    This is only checked the first time it's used after connecting to the database file
     
-        .. changes::
-            v0.0.2
-                Added pragma for guild_id
+        .. added:: v1.3.0 (replaces the `db_file_exists`, `leaderboard_exists`, and `verify_leaderboard_integrity` decorators)
     """
     @wraps(func)
-    async def wrapper(*args, **kwargs):
-        PRAGMA_LAYOUT = [
-            (0, 'guild_id', 'INT', 1, None, 0),
-            (1, 'member_id', 'INT', 1, None, 0),
-            (2, 'member_name', 'TEXT', 1, None, 0),
-            (3, 'member_level', 'INT', 1, None, 0),
-            (4, 'member_xp', 'INT', 1, None, 0),
-            (5, 'member_total_xp', 'INT', 1, None, 0)
-        ]
-        instance = _return_self(args) # type: ignore
-        async with instance._connection.execute('PRAGMA table_info(leaderboard)') as cursor:
-            current_layout = await cursor.fetchall()
-            if current_layout == PRAGMA_LAYOUT:
-                return await func(*args, **kwargs)
-            else:
-                raise ImproperLeaderboard
+    async def wrapper(self, *args, **kwargs):
+        # :meth:`DiscordLevelingSystem.connect_to_database_file()` has its own check for the file, but that method will only be called to setup the initial connection.
+        # Once everything is verified, the result is kept until a new connection is made
+        if not self._db_ready:
+            _verify_database_file(self)
+            await _verify_leaderboard(self)
+            self._db_ready = True
+        return await func(self, *args, **kwargs)
     return wrapper
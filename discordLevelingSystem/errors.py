@@ -24,13 +24,9 @@ DEALINGS IN THE SOFTWARE.
 
 class DiscordLevelingSystemError(Exception):
     """Base exception for :class:`DiscordLevelingSystem`"""
-    def __init__(self, message: str):
-        super().__init__(message)
 
 class RoleAwardError(DiscordLevelingSystemError):
     """Base exception for :class:`RoleAward`"""
-    def __init__(self, message: str):
-        super().__init__(message)
 
 class ConnectionFailure(DiscordLevelingSystemError):
     """Attempted to connect to the database file when the event loop is already running"""
@@ -44,13 +40,9 @@ class NotConnected(DiscordLevelingSystemError):
 
 class DatabaseFileNotFound(DiscordLevelingSystemError):
     """The database file was not found"""
-    def __init__(self, message):
-        super().__init__(message)
 
 class ImproperRoleAwardOrder(RoleAwardError):
     """When setting the awards :class:`dict` in the :class:`DiscordLevelingSystem` constructor, :attr:`RoleAward.level_requirement` was not greater than the last level"""
-    def __init__(self, message):
-        super().__init__(message)
 
 class ImproperLeaderboard(DiscordLevelingSystemError):
     """Raised when the leaderboard table in the database file does not have the correct settings"""
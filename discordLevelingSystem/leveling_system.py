@@ -27,18 +27,19 @@ import collections
 import json
 import os
 import random
-import shutil
+import sqlite3
 from collections.abc import Sequence
+from contextlib import closing
 from datetime import datetime
 from inspect import cleandoc
-from typing import Dict, List, Literal, NamedTuple, Optional, overload, Tuple, Union
+from typing import Dict, List, Literal, Optional, overload, Tuple, Union
 
 import aiosqlite
 from discord import Guild, Member, Message, MessageType, Role
 from discord.ext.commands import AutoShardedBot, Bot, BucketType, CooldownMapping
 
 from .announcement import LevelUpAnnouncement
-from .decorators import db_file_exists, leaderboard_exists, verify_leaderboard_integrity
+from .decorators import _LEADERBOARD_INDEX, _RANK_INDEX, db_ready
 from .errors import *
 from .levels_xp_needed import *
 from .member_data import MemberData
@@ -94,11 +95,92 @@ class DiscordLevelingSystem:
     - `database_file_path` (property)
     """
     
+    # the record isn't added if the member already has one (only possible when the unique index exists, see :attr:`_unique_members`). Used when the member was
+    # added by another coroutine between the UPDATE that didn't find them and this INSERT
     _QUERY_NEW_MEMBER = """
+        INSERT OR IGNORE INTO leaderboard
+        VALUES (?, ?, ?, ?, ?, ?)
+    """
+
+    # UPSERT (INSERT ... ON CONFLICT DO UPDATE) was added in SQLite 3.24.0. It needs the unique index on (guild_id, member_id)
+    _UPSERT = sqlite3.sqlite_version_info >= (3, 24, 0)
+
+    # the name of an existing record isn't changed
+    _QUERY_UPSERT_RECORD = """
         INSERT INTO leaderboard
         VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT (guild_id, member_id) DO UPDATE SET member_level = excluded.member_level, member_xp = excluded.member_xp, member_total_xp = excluded.member_total_xp
+    """
+
+    # the name is only changed when it's not NULL (:param:`refresh_name` in :meth:`award_xp`)
+    _QUERY_ADD_XP = """
+        UPDATE leaderboard
+        SET member_name = COALESCE(?, member_name), member_xp = member_xp + ?, member_total_xp = member_total_xp + ?
+        WHERE member_id = ? AND guild_id = ?
+    """
+
+    # adds a new member or gives XP to an existing one in a single query. The name is only changed when the last parameter (:param:`refresh_name` in :meth:`award_xp`) is true
+    _QUERY_AWARD_XP = """
+        INSERT INTO leaderboard
+        VALUES (?, ?, ?, 0, ?, ?)
+        ON CONFLICT (guild_id, member_id) DO UPDATE
+        SET member_name = CASE WHEN ? THEN excluded.member_name ELSE member_name END, member_xp = member_xp + excluded.member_xp, member_total_xp = member_total_xp + excluded.member_total_xp
+    """
+
+    _QUERY_LEVEL_UP = """
+        UPDATE leaderboard
+        SET member_level = ?, member_xp = 0
+        WHERE member_id = ? AND guild_id = ?
+    """
+
+    _QUERY_SET_RECORD = """
+        UPDATE leaderboard
+        SET member_level = ?, member_xp = ?, member_total_xp = ?
+        WHERE member_id = ? AND guild_id = ?
     """
 
+    _QUERY_RECORD = 'SELECT member_name, member_level, member_xp, member_total_xp FROM leaderboard WHERE member_id = ? AND guild_id = ?'
+
+    _QUERY_IN_GUILD = 'SELECT 1 FROM leaderboard WHERE member_id = ? AND guild_id = ? LIMIT 1'
+    _QUERY_IN_ANY_GUILD = 'SELECT 1 FROM leaderboard WHERE member_id = ? LIMIT 1'
+
+    _QUERY_GUILD_NAMES = 'SELECT member_id, member_name FROM leaderboard WHERE guild_id = ?'
+    _QUERY_SET_NAME = 'UPDATE leaderboard SET member_name = ? WHERE member_id = ? AND guild_id = ?'
+    _QUERY_RESET_MEMBER = 'UPDATE leaderboard SET member_level = 0, member_xp = 0, member_total_xp = 0 WHERE member_id = ? AND guild_id = ?'
+
+    # the amount of records kept in :attr:`_records`
+    _RECORD_CACHE_SIZE = 10000
+
+    # RETURNING (gets the updated record from the UPDATE itself instead of reading it afterwards) was added in SQLite 3.35.0
+    _RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+    _RETURNING_RECORD = ' RETURNING member_name, member_level, member_xp, member_total_xp'
+
+    # the rank is 1 + the amount of members in the guild that are ahead of them. When the total XP is the same, whoever was added to the database first is ahead. Both counts are read from the rank index
+    _RANK = """1
+            + (SELECT COUNT(*) FROM leaderboard WHERE guild_id = me.guild_id AND member_total_xp > me.member_total_xp)
+            + (SELECT COUNT(*) FROM leaderboard WHERE guild_id = me.guild_id AND member_total_xp = me.member_total_xp AND rowid < me.rowid)"""
+    _QUERY_RANK = 'SELECT %s FROM leaderboard AS me WHERE me.member_id = ? AND me.guild_id = ?' % _RANK
+
+    # the record and its rank in a single query, used by :meth:`get_data_for` when the record isn't in :attr:`_records`
+    _QUERY_RECORD_RANK = 'SELECT member_name, member_level, member_xp, member_total_xp, %s FROM leaderboard AS me WHERE me.member_id = ? AND me.guild_id = ?' % _RANK
+
+    # window functions (used to calculate every rank in a single query) were added in SQLite 3.25.0
+    _WINDOW_FUNCTIONS = sqlite3.sqlite_version_info >= (3, 25, 0)
+
+    # the JSON functions (json_each is used to pass every member ID in a single parameter) are only built in by default since SQLite 3.38.0
+    _JSON_EACH = sqlite3.sqlite_version_info >= (3, 38, 0)
+
+    # the query for each "sort_by" value of :meth:`each_member_data`. Each record comes with its rank already calculated by SQLite. If window functions aren't available, the rank is NULL and is looked up per member instead
+    _EACH_MEMBER_DATA = 'SELECT member_id, member_name, member_level, member_xp, member_total_xp, %s FROM leaderboard WHERE guild_id = ? ORDER BY %s'
+    _EACH_MEMBER_DATA_RANK = 'ROW_NUMBER() OVER (ORDER BY member_total_xp DESC, rowid)' if _WINDOW_FUNCTIONS else 'NULL'
+    _EACH_MEMBER_DATA_QUERIES = {
+        None : _EACH_MEMBER_DATA % (_EACH_MEMBER_DATA_RANK, 'rowid'),
+        'name' : _EACH_MEMBER_DATA % (_EACH_MEMBER_DATA_RANK, 'member_name COLLATE NOCASE, rowid'),
+        'level' : _EACH_MEMBER_DATA % (_EACH_MEMBER_DATA_RANK, 'member_level DESC, rowid'),
+        'xp' : _EACH_MEMBER_DATA % (_EACH_MEMBER_DATA_RANK, 'member_total_xp DESC, rowid'),
+        'rank' : _EACH_MEMBER_DATA % (_EACH_MEMBER_DATA_RANK, 'member_total_xp DESC, rowid') # ordering by total XP is the same as ordering by rank
+    }
+
     def __init__(self, rate: int=1, per: float=60.0, awards: Optional[Dict[int, List[RoleAward]]]=None, **kwargs):
         if rate <= 0 or per <= 0:   raise DiscordLevelingSystemError('Invalid rate or per. Values must be greater than zero')
         self.__rate = rate
@@ -107,17 +189,27 @@ class DiscordLevelingSystem:
         RoleAward._check(awards)
         self._awards = awards
 
-        self.no_xp_roles: Optional[Sequence[int]] = kwargs.get('no_xp_roles')
-        self.no_xp_channels: Optional[Sequence[int]] = kwargs.get('no_xp_channels')
+        # v1.3.0
+        # for each guild, the award for a level along with the award before it (the award itself if it's the first one). Used in :meth:`_handle_level_up` so the awards don't have to be searched on every level up
+        self._level_awards: Dict[int, Dict[int, Tuple[RoleAward, RoleAward]]] = {
+            guild_id : {award.level_requirement : (award, guild_awards[idx - 1] if idx else award) for idx, award in enumerate(guild_awards)}
+            for guild_id, guild_awards in awards.items()
+        } if awards else {}
+
+        self.no_xp_roles = kwargs.get('no_xp_roles')
+        self.no_xp_channels = kwargs.get('no_xp_channels')
         self.announce_level_up: bool = kwargs.get('announce_level_up', True)
         self.stack_awards: bool = kwargs.get('stack_awards', True)
         self.level_up_announcement: Union[LevelUpAnnouncement, Sequence[LevelUpAnnouncement]] = kwargs.get('level_up_announcement', LevelUpAnnouncement())
 
         self._connection: Optional[aiosqlite.Connection] = None
         self._cursor: Optional[aiosqlite.Cursor] = None
+
+        # v1.3.0
+        # (guild ID, member ID): (name, level, XP, total XP) of the most recently used records. Every method that changes a record removes it from here so it's read again
+        self._records: collections.OrderedDict[Tuple[int, int], Tuple[str, int, int, int]] = collections.OrderedDict()
         
         self._cooldown = CooldownMapping.from_cooldown(rate, per, BucketType.member)
-        self._loop = asyncio.get_event_loop()
         self._database_file_path: Optional[str] = None
 
         # v0.0.2
@@ -128,6 +220,10 @@ class DiscordLevelingSystem:
 
         # v1.0.2
         self.bot: Optional[Union[AutoShardedBot, Bot]] = kwargs.get('bot')
+
+        # v1.3.0
+        self._db_ready = False # set by the @db_ready decorator
+        self._unique_members = True # set by the @db_ready decorator. False when the database file has duplicate members, so it doesn't have the unique index
     
     @property
     def rate(self) -> int:
@@ -151,6 +247,38 @@ class DiscordLevelingSystem:
         """
         return self.__per
     
+    @property
+    def no_xp_roles(self) -> Optional[Tuple[int, ...]]:
+        """
+        Returns
+        -------
+        Optional[Tuple[:class:`int`, ...]]: The role IDs of the roles that prevent members from gaining XP. This is a copy of the sequence that was set, so to change them, set this to a new sequence
+
+            .. added:: v1.3.0 (was a plain attribute)
+        """
+        return self._no_xp_roles
+    
+    @no_xp_roles.setter
+    def no_xp_roles(self, value: Optional[Sequence[int]]) -> None:
+        self._no_xp_roles = tuple(value) if value is not None else None # a tuple so it can't be edited in place without also updating the set below
+        self._no_xp_role_ids = frozenset(value) if value else frozenset() # used by :meth:`_determine_no_xp` for constant time lookups
+    
+    @property
+    def no_xp_channels(self) -> Optional[Tuple[int, ...]]:
+        """
+        Returns
+        -------
+        Optional[Tuple[:class:`int`, ...]]: The text channel IDs where members can't gain XP. This is a copy of the sequence that was set, so to change them, set this to a new sequence
+
+            .. added:: v1.3.0 (was a plain attribute)
+        """
+        return self._no_xp_channels
+    
+    @no_xp_channels.setter
+    def no_xp_channels(self, value: Optional[Sequence[int]]) -> None:
+        self._no_xp_channels = tuple(value) if value is not None else None # a tuple so it can't be edited in place without also updating the set below
+        self._no_xp_channel_ids = frozenset(value) if value else frozenset() # used by :meth:`_determine_no_xp` for constant time lookups
+
     @property
     def database_file_path(self) -> Optional[str]:
         """
@@ -203,15 +331,20 @@ class DiscordLevelingSystem:
         ```
 
             .. added:: v0.0.2
+
+            .. changes::
+                v1.3.0
+                    The role IDs are also kept in a :class:`frozenset` so :meth:`award_xp` can check the members roles against them without looking up each role in the guild
         """
-        __slots__ = ('role_ids', 'bonus_amount', 'multiply')
+        __slots__ = ('role_ids', 'bonus_amount', 'multiply', '_role_id_set')
 
         def __repr__(self):
             return f'<Bonus role_ids={self.role_ids} bonus_amount={self.bonus_amount} multiply={self.multiply}>'
 
         def __init__(self, role_ids: Sequence[int], bonus_amount: int, multiply: bool):
-            if len(role_ids) >= 1:
+            if role_ids:
                 self.role_ids = role_ids
+                self._role_id_set = frozenset(role_ids)
                 self.bonus_amount = bonus_amount
                 self.multiply = multiply
 
@@ -275,41 +408,69 @@ class DiscordLevelingSystem:
         
         Raises
         ------
-        - `ConnectionFailure`: Attempted to create the database file when the event loop is already running
         - `DiscordLevelingSystemError`: The path does not exist or the path points to a file instead of a directory
         
             .. changes::
                 v0.0.2
                     Added guild_id for database file creation
+                v1.3.0
+                    The database file now uses write-ahead logging
+                    Added a unique index for each member in a guild
+                    Added an index for the ranks of each guild
+                    No longer uses the event loop, so it can be called while the event loop is running. `ConnectionFailure` is no longer raised
         """
         path = os.getcwd() if path is None else path
         if os.path.exists(path) and os.path.isdir(path):
             database_file = os.path.join(path, 'DiscordLevelingSystem.db')
+
+            # a write-ahead log left behind by a previous database file in this location would otherwise be applied to the new one
+            for leftover in (database_file + '-wal', database_file + '-shm'):
+                if os.path.exists(leftover):
+                    os.remove(leftover)
+            
+            # start from an empty file, then build the leaderboard table. This is a one-time setup so a plain (blocking) connection is used instead of aiosqlite
             with open(database_file, mode='w'):
-                try:
-                    loop = asyncio.get_event_loop()
-
-                    # create a temporary connection and build the leaderboard table
-                    connection: aiosqlite.Connection = loop.run_until_complete(aiosqlite.connect(database_file))
-                    query = """
-                        CREATE TABLE leaderboard (
-                            guild_id INT NOT NULL,
-                            member_id INT NOT NULL,
-                            member_name TEXT NOT NULL,
-                            member_level INT NOT NULL,
-                            member_xp INT NOT NULL,
-                            member_total_xp INT NOT NULL
-                        );
-                    """
-                    loop.run_until_complete(connection.execute(query))
-                    loop.run_until_complete(connection.commit())
-                except RuntimeError:
-                    raise ConnectionFailure
+                pass
+            
+            with closing(sqlite3.connect(database_file)) as connection:
+                connection.executescript(f"""
+                    PRAGMA journal_mode = WAL;
+                    CREATE TABLE leaderboard (
+                        guild_id INT NOT NULL,
+                        member_id INT NOT NULL,
+                        member_name TEXT NOT NULL,
+                        member_level INT NOT NULL,
+                        member_xp INT NOT NULL,
+                        member_total_xp INT NOT NULL
+                    );
+                    {_LEADERBOARD_INDEX};
+                    {_RANK_INDEX};
+                """)
         else:
             raise DiscordLevelingSystemError(f'The path {path!r} does not exist or that path directs to a file when it is suppose to path to a directory')
     
+    def _backup_file_path(self, path: str, with_timestamp: bool) -> str:
+        """Return the path of the backup file in the :param:`path` directory, removing the backup file that's already there
+        
+            .. added:: v1.3.0
+        """
+        if os.path.exists(path) and os.path.isdir(path):
+            if not with_timestamp:
+                database_file = os.path.join(path, 'DiscordLevelingSystem__backup.db')
+            else:
+                dt = datetime.now()
+                dt_str = dt.strftime('%Y_%b_%d__%I_%M_%S_%p__%f')
+                database_file = os.path.join(path, 'DiscordLevelingSystem__backup(%s).db' % dt_str)
+            
+            if os.path.exists(database_file):
+                os.remove(database_file)
+            return database_file
+        else:
+            raise DiscordLevelingSystemError(f'When attempting to backup the database file, the path "{path}" does not exist or points to another file')
+    
     def backup_database_file(self, path: str, with_timestamp: bool=False) -> None:
-        """Create a copy of the database file to the specified path. If a copy of the backup file is already in the specified path it will be overwritten
+        """Create a copy of the database file to the specified path. If a copy of the backup file is already in the specified path it will be overwritten.
+        This blocks until the copy is done, so while the bot is running use :meth:`backup_database_file_async()` instead
         
         Parameters
         ----------
@@ -323,23 +484,105 @@ class DiscordLevelingSystem:
         ------
         - `DiscordLevelingSystemError`: Path doesn't exist or points to another file
         - `NotConnected`: Attempted to use a method that requires a connection to a database file
+        
+            .. changes::
+                v1.3.0
+                    The copy is made with SQLite's online backup API instead of copying the file
         """
-        # the decorator @db_file_exists should be used here because if :attr:`_database_file_path` is :class:`None`, it will raise TypeError, which is exactly what Exception `NotConnected` is made for
+        # the decorator @db_ready should be used here because if :attr:`_database_file_path` is :class:`None`, it will raise TypeError, which is exactly what Exception `NotConnected` is made for
         # and is handled inside that decorator. But to repurpose the entire function to support functions that are not coroutines is unnecessary. A simple check is all thats needed for this
         if not self._database_file_path:
             raise NotConnected
-            
-        if os.path.exists(path) and os.path.isdir(path):
-            if not with_timestamp:
-                database_file = os.path.join(path, 'DiscordLevelingSystem__backup.db')
-                shutil.copyfile(src=self._database_file_path, dst=database_file)
-            else:
-                dt = datetime.now()
-                dt_str = dt.strftime('%Y_%b_%d__%I_%M_%S_%p__%f')
-                database_file = os.path.join(path, 'DiscordLevelingSystem__backup(%s).db' % dt_str)
-                shutil.copyfile(src=self._database_file_path, dst=database_file)
+        
+        database_file = self._backup_file_path(path, with_timestamp)
+        
+        # the online backup API copies a consistent snapshot of the database (including anything still in the write-ahead log), even if a write happens during the copy
+        with closing(sqlite3.connect(self._database_file_path)) as source, closing(sqlite3.connect(database_file)) as destination:
+            source.backup(destination, pages=1024)
+    
+    @db_ready
+    async def backup_database_file_async(self, path: str, with_timestamp: bool=False) -> None:
+        """|coro|
+        
+        Create a copy of the database file to the specified path. If a copy of the backup file is already in the specified path it will be overwritten.
+        Unlike :meth:`backup_database_file()`, the copy is made without blocking the event loop
+        
+        Parameters
+        ----------
+        path: :class:`str`
+            The path to copy the database file to
+
+        with_timestamp: :class:`bool`
+            (optional) Creates a unique file name that has the date and time of when the backup file was created. This is useful when you want multiple backup files (defaults to `False`)
+        
+        Raises
+        ------
+        - `DatabaseFileNotFound`: The database file was not found
+        - `LeaderboardNotFound`: Table "leaderboard" in the database file is missing
+        - `ImproperLeaderboard`: Leaderboard table was altered. Components changed or deleted
+        - `NotConnected`: Attempted to use a method that requires a connection to a database file
+        - `DiscordLevelingSystemError`: Path doesn't exist or points to another file
+        
+            .. added:: v1.3.0
+        """
+        database_file = self._backup_file_path(path, with_timestamp)
+        
+        # the backup runs on the connection's thread in one step, queued with the other queries. The destination is only used by that thread until the backup is done
+        with closing(sqlite3.connect(database_file, check_same_thread=False)) as destination:
+            await self._connection.backup(destination) # type: ignore
+    
+    @staticmethod
+    async def _setup_connection(connection: aiosqlite.Connection) -> None:
+        """|coro|
+        
+        Apply the settings used for every connection to the database file. Write-ahead logging with `synchronous=NORMAL` means commits don't have to wait
+        for the whole file to be synced to disk, and readers don't block writers
+
+            .. added:: v1.3.0
+        """
+        await connection.execute('PRAGMA journal_mode = WAL')
+        await connection.execute('PRAGMA synchronous = NORMAL')
+        await connection.execute('PRAGMA temp_store = MEMORY')
+        await connection.execute('PRAGMA cache_size = -20000') # KiB
+        await connection.execute('PRAGMA secure_delete = OFF') # some SQLite builds turn this on by default, which zeroes out every deleted record on disk
+        await connection.execute('PRAGMA mmap_size = 268435456') # 256 MiB. Reads are served from the memory mapped file instead of copying pages through read() calls
+    
+    @staticmethod
+    def _run(coro):
+        """|static method| Run the coroutine to completion from synchronous code on an event loop of its own, which is closed afterwards. Used before the bot is started
+
+        Raises
+        ------
+        - `ConnectionFailure`: An event loop is already running
+
+            .. added:: v1.3.0
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
         else:
-            raise DiscordLevelingSystemError(f'When attempting to backup the database file, the path "{path}" does not exist or points to another file')
+            coro.close()
+            raise ConnectionFailure
+        
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(coro)
+        finally:
+            loop.close()
+    
+    @staticmethod
+    async def _connect(path: str) -> Tuple[aiosqlite.Connection, aiosqlite.Cursor]:
+        """|coro|
+        
+        Open a connection to the database file in the specified path, apply the connection settings, and return the connection and its cursor. Done in one coroutine so
+        a synchronous caller only has to run the event loop once
+
+            .. added:: v1.3.0
+        """
+        connection = await aiosqlite.connect(path)
+        await DiscordLevelingSystem._setup_connection(connection)
+        return connection, await connection.cursor()
     
     def connect_to_database_file(self, path: str) -> None:
         """Connect to the existing database file in the specified path
@@ -353,14 +596,16 @@ class DiscordLevelingSystem:
         ------
         - `ConnectionFailure`: Attempted to connect to the database file when the event loop is already running
         - `DatabaseFileNotFound`: The database file was not found
+
+            .. changes::
+                v1.3.0
+                    Connects using an event loop of its own instead of the one from :func:`asyncio.get_event_loop` that was stored when the class was created
         """
         if all([os.path.exists(path), os.path.isfile(path), path.endswith('.db')]):
-            try:
-                self._connection = self._loop.run_until_complete(aiosqlite.connect(path))
-                self._cursor = self._loop.run_until_complete(self._connection.cursor())
-                self._database_file_path = path
-            except RuntimeError:
-                raise ConnectionFailure
+            self._connection, self._cursor = DiscordLevelingSystem._run(DiscordLevelingSystem._connect(path))
+            self._database_file_path = path
+            self._db_ready = False
+            self._records.clear()
         else:
             raise DatabaseFileNotFound(f'The database file in path {path!r} was not found')
 
@@ -388,9 +633,10 @@ class DiscordLevelingSystem:
             if self._connection is not None:
                 await self._connection.close()
 
-            self._connection = await aiosqlite.connect(path)
-            self._cursor = await self._connection.cursor()
+            self._connection, self._cursor = await DiscordLevelingSystem._connect(path)
             self._database_file_path = path
+            self._db_ready = False
+            self._records.clear()
         else:
             raise DatabaseFileNotFound(f'The database file in path {path!r} was not found')
     
@@ -400,70 +646,64 @@ class DiscordLevelingSystem:
             .. changes::
                 v0.0.2
                     Complete overhaul to support multi-guild leveling 
+                v1.3.0
+                    The no XP roles and channels are looked up in a :class:`frozenset`
         """
-        has_no_xp_role = False
-        in_no_xp_channel = False
+        if message.channel.id in self._no_xp_channel_ids:
+            return True
         
-        if self.no_xp_channels:
-            if message.channel.id in self.no_xp_channels:
-                in_no_xp_channel = True
+        # stops at the first no xp role that's found instead of collecting all of the members role IDs first
+        if self._no_xp_role_ids:
+            return not self._no_xp_role_ids.isdisjoint(role.id for role in message.author.roles) # type: ignore / will always be :class:`discord.Member` because all DM messages are ignored by the lib
         
-        # if :var:`in_no_xp_channel` is already `True`, there's no need to execute the no xp role check
-        if in_no_xp_channel:
-            return True
-
-        if self.no_xp_roles:
-            all_member_role_ids = [role.id for role in message.author.roles] # type: ignore / will always be :class:`discord.Member` because all DM messages are ignored by the lib
-            for no_xp_role_id in self.no_xp_roles:
-                if no_xp_role_id in all_member_role_ids:
-                    has_no_xp_role = True
-                    break
-
-        return any([has_no_xp_role, in_no_xp_channel])        
-    
-    async def _update_record(self, member: Union[Member, int], level: int, xp: int, total_xp: int, guild_id: int, name: Optional[str]=None, **kwargs) -> None:
-        maybe_new_record = kwargs.get('maybe_new_record', False)
-        if maybe_new_record and not name:
-            raise Exception('kwarg "name" needs to be set when adding a new record')
-        
-        # :meth:`DiscordLevelingSystem.is_in_database` parameter "guild" expects a :class:`discord.Guild` object. We don't necessarily *need* an actual :class:`discord.Guild`
-        # object because that method really only needs the ID to operate on the correct guild. Since this method has no :class:`discord.Guild` object, just make a false guild
-        # object so :meth:`DiscordLevelingSystem.is_in_database` will work as intended
-        FakeGuild = collections.namedtuple('FakeGuild', 'id')
-        if await self.is_in_database(member, guild=FakeGuild(id=guild_id)): # type: ignore / it's a fake guild, so yes, it's not compatible with :class:`discord.Guild` that the method is looking for
-            await self._cursor.execute('UPDATE leaderboard SET member_level = ?, member_xp = ?, member_total_xp = ? WHERE member_id = ? AND guild_id = ?', (level, xp, total_xp, member.id if isinstance(member, Member) else member, guild_id)) # type: ignore
-        else:
-            await self._cursor.execute(DiscordLevelingSystem._QUERY_NEW_MEMBER, (guild_id, member.id if isinstance(member, Member) else member, name, level, xp, total_xp)) # type: ignore
-        await self._connection.commit() # type: ignore
+        return False
     
-    @staticmethod
-    def _get_transfer(path: str, loop: asyncio.AbstractEventLoop) -> NamedTuple:
-        """|static method| Connect to the target database file in the specified path and return a named tuple of the connection and cursor
+    async def _update_record(self, member: Union[Member, int], level: int, xp: int, total_xp: int, guild_id: int, name: Optional[str]=None) -> None:
+        """|coro|
         
-            .. added:: v0.0.2
+        Set the level and XP of a member, adding a new record for them if they aren't in the database. :param:`name` is only used for a new record (and is required for one),
+        the name of an existing record isn't changed
+        
+            .. changes::
+                v1.3.0
+                    The record is updated and inserted with a single UPSERT instead of checking :meth:`is_in_database` beforehand. If UPSERT can't be used, it's updated first and only
+                    inserted if nothing was updated
+                    Removed kwarg "maybe_new_record"
         """
-        if all([os.path.exists(path), os.path.isfile(path), path.endswith('.db')]):
-            try:
-                connection = loop.run_until_complete(aiosqlite.connect(path))
-                cursor = loop.run_until_complete(connection.cursor())
-                Transfer = collections.namedtuple('Transfer', ['connection', 'cursor'])
-                return Transfer(connection=connection, cursor=cursor)
-            except RuntimeError:
-                raise ConnectionFailure
+        member_id = member.id if isinstance(member, Member) else member
+        
+        if name is not None and self._unique_members and DiscordLevelingSystem._UPSERT:
+            await self._cursor.execute(DiscordLevelingSystem._QUERY_UPSERT_RECORD, (guild_id, member_id, name, level, xp, total_xp)) # type: ignore
         else:
-            raise DatabaseFileNotFound(f'The database file in path {path!r} was not found')
+            # a cursor of its own so another coroutine using :attr:`_cursor` can't change the rowcount before it's read
+            async with self._connection.execute(DiscordLevelingSystem._QUERY_SET_RECORD, (level, xp, total_xp, member_id, guild_id)) as cursor: # type: ignore
+                updated = cursor.rowcount > 0
+            
+            # without a name the record can't be added, only updated
+            if not updated and name is not None:
+                async with self._connection.execute(DiscordLevelingSystem._QUERY_NEW_MEMBER, (guild_id, member_id, name, level, xp, total_xp)) as cursor: # type: ignore
+                    inserted = cursor.rowcount > 0
+                
+                # another coroutine added the member after the UPDATE above didn't find them
+                if not inserted:
+                    await self._cursor.execute(DiscordLevelingSystem._QUERY_SET_RECORD, (level, xp, total_xp, member_id, guild_id)) # type: ignore
+        self._records.pop((guild_id, member_id), None)
+        await self._connection.commit() # type: ignore
     
     @staticmethod
-    async def _execute_transfer(db_from: 'Transfer', db_to: 'Transfer', guild_id: int) -> None: # type: ignore
+    async def _execute_transfer(old: str, new: str, guild_id: int) -> None:
         """|coro static method| Copy the contents from the old database file (v0.0.1), to the new database file (v0.0.2+)
         
             .. added:: v0.0.2
+
+            .. changes::
+                v1.3.0
+                    The old database file is attached to the new one and the records are copied with a single INSERT ... SELECT instead of going through python
+                    Connects to the new database file itself (replaces :meth:`_get_transfer`) and closes the connection when it's done
         """
+        connection, cursor = await DiscordLevelingSystem._connect(new)
         try:
-            from_result = await db_from.connection.execute_fetchall('SELECT * FROM leaderboard')
-        except aiosqlite.OperationalError:
-            raise DiscordLevelingSystemError('One of the databases is missing the "leaderboard" table when attempting to transfer')
-        else:
+            await connection.execute('ATTACH DATABASE ? AS old_database', (old,))
             OLD_PRAGMA_LAYOUT = [
                 (0, 'member_id', 'INT', 0, None, 1),
                 (1, 'member_name', 'TEXT', 1, None, 0),
@@ -479,24 +719,30 @@ class DiscordLevelingSystem:
                 (4, 'member_xp', 'INT', 1, None, 0),
                 (5, 'member_total_xp', 'INT', 1, None, 0)
             ]
-            old_pragma_check = await db_from.connection.execute_fetchall('PRAGMA table_info(leaderboard)')
-            new_pragma_check = await db_to.connection.execute_fetchall('PRAGMA table_info(leaderboard)')
+            old_pragma_check = await connection.execute_fetchall('PRAGMA old_database.table_info(leaderboard)')
+            if not old_pragma_check:
+                raise DiscordLevelingSystemError('One of the databases is missing the "leaderboard" table when attempting to transfer')
+            
+            new_pragma_check = await connection.execute_fetchall('PRAGMA main.table_info(leaderboard)')
             if all([old_pragma_check == OLD_PRAGMA_LAYOUT, new_pragma_check == NEW_PRAGMA_LAYOUT]):
                 # ensure the database file that the data will be transferred to is blank, if so, copy the contents to the new database file
-                await db_to.cursor.execute('SELECT COUNT(*) FROM leaderboard')
-                count_result = await db_to.cursor.fetchone()
+                await cursor.execute('SELECT COUNT(*) FROM main.leaderboard')
+                count_result = await cursor.fetchone()
                 if count_result[0] == 0:
-                    to_execute = []
-                    for data in from_result:
-                        to_execute.append((guild_id, data[0], data[1], data[2], data[3], data[4]))
-                    else:
-                        await db_to.cursor.executemany(DiscordLevelingSystem._QUERY_NEW_MEMBER, to_execute)
-                        await db_to.connection.commit()
-                        print('Transfer complete')
+                    # each old record is (member_id, member_name, member_level, member_xp, member_total_xp), the new layout only adds the guild ID in front
+                    await cursor.execute(
+                        'INSERT INTO main.leaderboard SELECT ?, member_id, member_name, member_level, member_xp, member_total_xp FROM old_database.leaderboard ORDER BY rowid',
+                        (guild_id,)
+                    )
+                    await connection.commit()
+                    print('Transfer complete')
                 else:
                     raise DiscordLevelingSystemError('When transferring the data to the new database file (created file using v0.0.2+), that database file must contain no records')
             else:
                 raise DiscordLevelingSystemError('The "transfer" method is only to be used with transferring the data from the database file from version 0.0.1. If you were already using a database file from version 0.0.2+, there is no need to use this method')
+        finally:
+            # closing the connection also detaches the old database file
+            await connection.close()
     
     @staticmethod
     def transfer(old: str, new: str, guild_id: int) -> None:
@@ -526,14 +772,13 @@ class DiscordLevelingSystem:
         
             .. added:: v0.0.2
         """
-        loop = asyncio.get_event_loop()
-        transfer_from = DiscordLevelingSystem._get_transfer(old, loop)
-        transfer_to = DiscordLevelingSystem._get_transfer(new, loop)
-        loop.run_until_complete(DiscordLevelingSystem._execute_transfer(transfer_from, transfer_to, guild_id))
-    
-    @db_file_exists
-    @leaderboard_exists
-    @verify_leaderboard_integrity
+        for path in (old, new):
+            if not all([os.path.exists(path), os.path.isfile(path), path.endswith('.db')]):
+                raise DatabaseFileNotFound(f'The database file in path {path!r} was not found')
+        
+        DiscordLevelingSystem._run(DiscordLevelingSystem._execute_transfer(old, new, guild_id))
+    
+    @db_ready
     async def add_record(self, guild_id: int, member_id: int, member_name: str, level: int) -> None:
         """|coro|
         
@@ -563,7 +808,7 @@ class DiscordLevelingSystem:
         if all([isinstance(guild_id, int), isinstance(member_id, int), isinstance(level, int)]):
             if not (0 <= level <= 100):
                 raise DiscordLevelingSystemError('Parameter "level" must be from 0-100')
-            await self._update_record(member=member_id, level=level, xp=0, total_xp=LEVELS_AND_XP[str(level)], guild_id=guild_id, name=str(member_name), maybe_new_record=True)
+            await self._update_record(member=member_id, level=level, xp=0, total_xp=LEVELS_AND_XP[str(level)], guild_id=guild_id, name=str(member_name))
         else:
             raise DiscordLevelingSystemError('All parameters that expect an int were not of type int')
     
@@ -575,9 +820,7 @@ class DiscordLevelingSystem:
     async def insert(self, bot: Bot, guild_id: int, users: Dict[int, int], using: Literal['xp', 'levels'], overwrite: bool=False, show_results: bool=True) -> None:
         ...
 
-    @db_file_exists
-    @leaderboard_exists
-    @verify_leaderboard_integrity
+    @db_ready
     async def insert(self, bot: Union[Bot, AutoShardedBot], guild_id: int, users: Dict[int, int], using: Literal['xp', 'levels'], overwrite: bool=False, show_results: bool=True) -> None:
         """|coro|
         
@@ -649,7 +892,7 @@ class DiscordLevelingSystem:
                         elif using == 'xp':
                             xp = user_level_or_xp
                             if xp < 0: xp = 0
-                            elif xp > LEVELS_AND_XP[str(MAX_LEVEL)]: xp = LEVELS_AND_XP[str(MAX_LEVEL)]
+                            elif xp > MAX_XP: xp = MAX_XP
                             await self.set_level(member, _find_level(xp))
                             successfully_added.append(member)
                         
@@ -726,9 +969,7 @@ class DiscordLevelingSystem:
         else:
             return None
     
-    @db_file_exists
-    @leaderboard_exists
-    @verify_leaderboard_integrity
+    @db_ready
     async def add_xp(self, member: Member, amount: int) -> None:
         """|coro|
         
@@ -751,23 +992,25 @@ class DiscordLevelingSystem:
         - `DiscordLevelingSystemError`: Parameter "amount" was less than or equal to zero. The minimum value is 1 
         
             .. added:: v0.0.2
+
+            .. changes::
+                v1.3.0
+                    The members record is read from :attr:`_records` (or the database) instead of getting their :class:`MemberData`, which also calculated their rank
         """
         if amount <= 0:
             raise DiscordLevelingSystemError('Parameter "amount" was less than or equal to zero. The minimum value is 1')
         
-        md = await self.get_data_for(member)
-        if md:
-            if md.total_xp >= MAX_XP:
+        record = await self._get_record(member)
+        if record:
+            _, _, xp, total_xp = record
+            if total_xp >= MAX_XP:
                 return
             else:
-                new_total_xp = md.total_xp + amount
-                new_total_xp = new_total_xp if new_total_xp <= MAX_XP else MAX_XP
+                new_total_xp = min(total_xp + amount, MAX_XP)
                 maybe_new_level = _find_level(new_total_xp)
-                await self._update_record(member=member, level=maybe_new_level, xp=md.xp, total_xp=new_total_xp, guild_id=member.guild.id, name=str(member), maybe_new_record=True)
+                await self._update_record(member=member, level=maybe_new_level, xp=xp, total_xp=new_total_xp, guild_id=member.guild.id, name=str(member))
     
-    @db_file_exists
-    @leaderboard_exists
-    @verify_leaderboard_integrity
+    @db_ready
     async def remove_xp(self, member: Member, amount: int) -> None:
         """|coro|
         
@@ -790,23 +1033,25 @@ class DiscordLevelingSystem:
         - `DiscordLevelingSystemError`: Parameter "amount" was less than or equal to zero. The minimum value is 1 
         
             .. added:: v0.0.2
+
+            .. changes::
+                v1.3.0
+                    The members record is read from :attr:`_records` (or the database) instead of getting their :class:`MemberData`, which also calculated their rank
         """
         if amount <= 0:
             raise DiscordLevelingSystemError('Parameter "amount" was less than or equal to zero. The minimum value is 1')
         
-        md = await self.get_data_for(member)
-        if md:
-            if md.total_xp == 0:
+        record = await self._get_record(member)
+        if record:
+            _, _, xp, total_xp = record
+            if total_xp == 0:
                 return
             else:
-                new_total_xp = md.total_xp - amount
-                new_total_xp = new_total_xp if new_total_xp >= 1 else 0
+                new_total_xp = max(total_xp - amount, 0)
                 maybe_new_level = _find_level(new_total_xp)
-                await self._update_record(member=member, level=maybe_new_level, xp=md.xp, total_xp=new_total_xp, guild_id=member.guild.id)
+                await self._update_record(member=member, level=maybe_new_level, xp=xp, total_xp=new_total_xp, guild_id=member.guild.id)
     
-    @db_file_exists
-    @leaderboard_exists
-    @verify_leaderboard_integrity
+    @db_ready
     async def set_level(self, member: Member, level: int) -> None:
         """|coro|
         
@@ -831,13 +1076,11 @@ class DiscordLevelingSystem:
             .. added:: v0.0.2
         """
         if 0 <= level <= 100:
-            await self._update_record(member=member, level=level, xp=0, total_xp=LEVELS_AND_XP[str(level)], guild_id=member.guild.id, name=str(member), maybe_new_record=True)
+            await self._update_record(member=member, level=level, xp=0, total_xp=LEVELS_AND_XP[str(level)], guild_id=member.guild.id, name=str(member))
         else:
             raise DiscordLevelingSystemError('Parameter "level" must be from 0-100')
     
-    @db_file_exists
-    @leaderboard_exists
-    @verify_leaderboard_integrity
+    @db_ready
     async def change_cooldown(self, rate: int, per: float) -> None:
         """|coro|
         
@@ -864,9 +1107,7 @@ class DiscordLevelingSystem:
         self.__rate = rate
         self.__per = per
 
-    @db_file_exists
-    @leaderboard_exists
-    @verify_leaderboard_integrity
+    @db_ready
     async def refresh_names(self, guild: Guild) -> int:
         """|coro|
         
@@ -889,28 +1130,23 @@ class DiscordLevelingSystem:
         - `ImproperLeaderboard`: Leaderboard table was altered. Components changed or deleted
         - `NotConnected`: Attempted to use a method that requires a connection to a database file
         """
-        async with self._connection.execute('SELECT member_id, member_name FROM leaderboard WHERE guild_id = ?', (guild.id,)) as cursor: # type: ignore
-            result = await cursor.fetchall()
-            names_updated = 0
-            if result:
-                database_ids = [db[0] for db in result]
-                database_names = [db[1] for db in result]
-                to_execute = []
-                for db_id, db_name in zip(database_ids, database_names):
-                    member = guild.get_member(db_id)
-                    if member:
-                        if str(member) != db_name:
-                            to_execute.append((str(member), db_id, guild.id))
-                            names_updated += 1
-                else: 
-                    await cursor.executemany('UPDATE leaderboard SET member_name = ? WHERE member_id = ? AND guild_id = ?', to_execute)
-                    await self._connection.commit() # type: ignore
-
-            return names_updated
+        result = await self._connection.execute_fetchall(DiscordLevelingSystem._QUERY_GUILD_NAMES, (guild.id,)) # type: ignore
+        to_execute = []
+        for db_id, db_name in result:
+            member = guild.get_member(db_id)
+            if member:
+                member_name = str(member)
+                if member_name != db_name:
+                    to_execute.append((member_name, db_id, guild.id))
+        
+        # all of the updates are done in a single transaction, and nothing is written if every name is already up to date
+        if to_execute:
+            await self._cursor.executemany(DiscordLevelingSystem._QUERY_SET_NAME, to_execute) # type: ignore
+            self._records.clear()
+            await self._connection.commit() # type: ignore
+        return len(to_execute)
     
-    @db_file_exists
-    @leaderboard_exists
-    @verify_leaderboard_integrity
+    @db_ready
     async def wipe_database(self, guild: Optional[Guild]=None, *, intentional: bool=False) -> None:
         """|coro|
         
@@ -939,13 +1175,12 @@ class DiscordLevelingSystem:
         if intentional:
             if guild:   await self._cursor.execute('DELETE FROM leaderboard WHERE guild_id = ?', (guild.id,)) # type: ignore
             else:       await self._cursor.execute('DELETE FROM leaderboard') # type: ignore
+            self._records.clear()
             await self._connection.commit() # type: ignore
         else:
             raise FailSafe
     
-    @db_file_exists
-    @leaderboard_exists
-    @verify_leaderboard_integrity
+    @db_ready
     async def clean_database(self, guild: Guild) -> int:
         """|coro|
         
@@ -971,27 +1206,29 @@ class DiscordLevelingSystem:
             .. changes::
                 v0.0.2
                     Replaced :param:`all_members` with :param:`guild`
+                v1.3.0
+                    The records are removed with a single DELETE statement
         """
-        result = await self._connection.execute_fetchall('SELECT member_id FROM leaderboard WHERE guild_id = ?', (guild.id,)) # type: ignore
-        all_ids = [i[0] for i in result]
-        to_execute = []
-        records_removed = 0
-
-        for id_ in all_ids:
-            if guild.get_member(id_):
-                continue
-            else:
-                to_execute.append((id_, guild.id))
-                records_removed += 1
+        if DiscordLevelingSystem._JSON_EACH:
+            # the IDs of the members that are still in the guild are passed as a single JSON array so SQLite can find the records to remove by itself
+            query = 'DELETE FROM leaderboard WHERE guild_id = ? AND member_id NOT IN (SELECT value FROM json_each(?))'
+            params = (guild.id, json.dumps([member.id for member in guild.members]))
         else:
-            if records_removed:
-                await self._cursor.executemany('DELETE FROM leaderboard WHERE member_id = ? AND guild_id = ?', to_execute) # type: ignore
-                await self._connection.commit() # type: ignore
-            return records_removed
-    
-    @db_file_exists
-    @leaderboard_exists
-    @verify_leaderboard_integrity
+            # without the JSON functions, the IDs are put in a temporary table instead
+            await self._cursor.execute('CREATE TEMP TABLE IF NOT EXISTS current_members (member_id INTEGER PRIMARY KEY)') # type: ignore
+            await self._cursor.execute('DELETE FROM current_members') # type: ignore
+            await self._cursor.executemany('INSERT INTO current_members VALUES (?)', [(member.id,) for member in guild.members]) # type: ignore
+            query = 'DELETE FROM leaderboard WHERE guild_id = ? AND member_id NOT IN (SELECT member_id FROM current_members)'
+            params = (guild.id,)
+        
+        # a cursor of its own so another coroutine using :attr:`_cursor` can't change the rowcount before it's read
+        async with self._connection.execute(query, params) as cursor: # type: ignore
+            records_removed = cursor.rowcount
+        self._records.clear()
+        await self._connection.commit() # type: ignore
+        return records_removed
+    
+    @db_ready
     async def reset_member(self, member: Member) -> None:
         """|coro|
         
@@ -1009,7 +1246,8 @@ class DiscordLevelingSystem:
         - `ImproperLeaderboard`: Leaderboard table was altered. Components changed or deleted
         - `NotConnected`: Attempted to use a method that requires a connection to a database file
         """
-        await self._cursor.execute('UPDATE leaderboard SET member_level = 0, member_xp = 0, member_total_xp = 0 WHERE member_id = ? AND guild_id = ?', (member.id, member.guild.id)) # type: ignore
+        await self._cursor.execute(DiscordLevelingSystem._QUERY_RESET_MEMBER, (member.id, member.guild.id)) # type: ignore
+        self._records.pop((member.guild.id, member.id), None)
         await self._connection.commit() # type: ignore
     
     @overload
@@ -1020,9 +1258,7 @@ class DiscordLevelingSystem:
     async def reset_everyone(self, guild: None, *, intentional: bool=False) -> None:
         ...
     
-    @db_file_exists
-    @leaderboard_exists
-    @verify_leaderboard_integrity
+    @db_ready
     async def reset_everyone(self, guild: Union[Guild, None], *, intentional: bool=False) -> None:
         """|coro|
         
@@ -1047,10 +1283,14 @@ class DiscordLevelingSystem:
             .. changes::
                 v0.0.2
                     Added :param:`guild`
+                v1.3.0
+                    Records that are already reset are no longer rewritten
         """
         if intentional:
-            if guild: await self._cursor.execute('UPDATE leaderboard SET member_level = 0, member_xp = 0, member_total_xp = 0 WHERE guild_id = ?', (guild.id,)) # type: ignore
-            else:     await self._cursor.execute('UPDATE leaderboard SET member_level = 0, member_xp = 0, member_total_xp = 0') # type: ignore
+            # records that are already reset are skipped so they aren't rewritten
+            if guild: await self._cursor.execute('UPDATE leaderboard SET member_level = 0, member_xp = 0, member_total_xp = 0 WHERE guild_id = ? AND (member_level != 0 OR member_xp != 0 OR member_total_xp != 0)', (guild.id,)) # type: ignore
+            else:     await self._cursor.execute('UPDATE leaderboard SET member_level = 0, member_xp = 0, member_total_xp = 0 WHERE member_level != 0 OR member_xp != 0 OR member_total_xp != 0') # type: ignore
+            self._records.clear()
             await self._connection.commit() # type: ignore
         else:
             raise FailSafe
@@ -1063,9 +1303,7 @@ class DiscordLevelingSystem:
     async def export_as_json(self, path: str, guild: None) -> None:
         ...
     
-    @db_file_exists
-    @leaderboard_exists
-    @verify_leaderboard_integrity
+    @db_ready
     async def export_as_json(self, path: str, guild: Union[Guild, None]) -> None:
         """|coro|
         
@@ -1091,53 +1329,40 @@ class DiscordLevelingSystem:
                 v0.0.2
                     Added :param:`guild`. Now supports a specific guild to export
                     Improved overall json format (easier to read)
+                v1.3.0
+                    Records are written to the file as they're read from the database
         """
         if os.path.exists(path) and os.path.isdir(path):
             path = os.path.join(path, 'discord_leveling_system.json')
-            container = []
             if guild:
-                data = await self._connection.execute_fetchall('SELECT member_id, member_name, member_level, member_xp, member_total_xp FROM leaderboard WHERE guild_id = ?', (guild.id,)) # type: ignore
-                levels = {}
-                for m_id, m_name, m_lvl, m_xp, m_total_xp in data:
-                    levels = {
-                        'id' : m_id,
-                        'name' : m_name,
-                        'level' : m_lvl,
-                        'xp' : m_xp,
-                        'total_xp' : m_total_xp
-                    }
-                    container.append(levels.copy())
-                else:
-                    with open(path, mode='w') as fp:
-                        json.dump(container, fp, indent=4)
-            
+                keys = ('id', 'name', 'level', 'xp', 'total_xp')
+                cursor = await self._connection.execute('SELECT member_id, member_name, member_level, member_xp, member_total_xp FROM leaderboard WHERE guild_id = ? ORDER BY rowid', (guild.id,)) # type: ignore
             else:
-                data = await self._connection.execute_fetchall('SELECT * FROM leaderboard') # type: ignore
-                for info in data:
-                    guild_id = info[0]
-                    member_id = info[1]
-                    member_name = info[2]
-                    member_level = info[3]
-                    member_xp = info[4]
-                    member_total_xp = info[5]
-                    levels = {
-                        'guild_id' : guild_id,
-                        'member_id' : member_id,
-                        'name' : member_name,
-                        'level' : member_level,
-                        'xp' : member_xp,
-                        'total_xp' : member_total_xp
-                    }
-                    container.append(levels.copy())
-                else:
-                    with open(path, mode='w') as fp:
-                        json.dump(container, fp, indent=4)
+                keys = ('guild_id', 'member_id', 'name', 'level', 'xp', 'total_xp')
+                cursor = await self._connection.execute('SELECT * FROM leaderboard') # type: ignore
+            
+            # the records are written as they're fetched instead of loading the whole table into memory first. The output is
+            # exactly what `json.dump(records, fp, indent=4)` would produce. Each record is a flat object, so it's filled into a template
+            # instead of building a dict and going through the (pure python) indenting encoder for every record
+            record_template = '{' + ','.join('\n        "%s": %%s' % key for key in keys) + '\n    }'
+            dumps = json.dumps
+            async with cursor:
+                with open(path, mode='w') as fp:
+                    fp.write('[')
+                    empty = True
+                    while True:
+                        rows = await cursor.fetchmany(500)
+                        if not rows:
+                            break
+                        for row in rows:
+                            fp.write('\n    ' if empty else ',\n    ')
+                            fp.write(record_template % tuple(map(dumps, row)))
+                            empty = False
+                    fp.write(']' if empty else '\n]')
         else:
             raise DiscordLevelingSystemError(f'The path {path!r} does not exist or does not point to a directory')
 
-    @db_file_exists
-    @leaderboard_exists
-    @verify_leaderboard_integrity
+    @db_ready
     async def raw_database_contents(self, guild: Optional[Guild]=None) -> List[Tuple[int, int, str, int, int, int]]:
         """|coro|
         
@@ -1172,7 +1397,7 @@ class DiscordLevelingSystem:
                 v0.0.2
                     Added :param:`guild`
         """
-        if guild:   return await self._connection.execute_fetchall('SELECT * FROM leaderboard WHERE guild_id = ?', (guild.id,)) # type: ignore
+        if guild:   return await self._connection.execute_fetchall('SELECT * FROM leaderboard WHERE guild_id = ? ORDER BY rowid', (guild.id,)) # type: ignore
         else:       return await self._connection.execute_fetchall('SELECT * FROM leaderboard') # type: ignore
     
     @overload
@@ -1183,9 +1408,7 @@ class DiscordLevelingSystem:
     async def remove_from_database(self, member: int, guild: Optional[Guild]=None) -> bool:
         ...
 
-    @db_file_exists
-    @leaderboard_exists
-    @verify_leaderboard_integrity
+    @db_ready
     async def remove_from_database(self, member: Union[Member, int], guild: Optional[Guild]=None) -> bool:
         """|coro|
         
@@ -1218,14 +1441,16 @@ class DiscordLevelingSystem:
         """
         if isinstance(member, (Member, int)):
             member_id = member.id if isinstance(member, Member) else member
-            removable = await self.is_in_database(member_id, guild=guild if guild else None)
-            if removable:
-                query = 'DELETE FROM leaderboard WHERE member_id = ? AND guild_id = ?' if guild else 'DELETE FROM leaderboard WHERE member_id = ?'
-                params = (member_id, guild.id) if guild else (member_id,)
-                
-                await self._cursor.execute(query, params) # type: ignore
-                await self._connection.commit() # type: ignore
-            return removable
+            query = 'DELETE FROM leaderboard WHERE member_id = ? AND guild_id = ?' if guild else 'DELETE FROM leaderboard WHERE member_id = ?'
+            params = (member_id, guild.id) if guild else (member_id,)
+            
+            # the amount of deleted rows tells if they were in the database, so there's no need to check beforehand
+            async with self._connection.execute(query, params) as cursor: # type: ignore
+                removed = cursor.rowcount > 0
+            if guild:   self._records.pop((guild.id, member_id), None)
+            else:       self._records.clear()
+            await self._connection.commit() # type: ignore
+            return removed
         else:
             raise DiscordLevelingSystemError(f'Parameter "member" expected discord.Member or int, got {member.__class__.__name__}')
     
@@ -1237,9 +1462,7 @@ class DiscordLevelingSystem:
     async def is_in_database(self, member: int, guild: Optional[Guild]=None) -> bool:
         ...
 
-    @db_file_exists
-    @leaderboard_exists
-    @verify_leaderboard_integrity
+    @db_ready
     async def is_in_database(self, member: Union[Member, int], guild: Optional[Guild]=None) -> bool:
         """|coro|
         
@@ -1271,17 +1494,13 @@ class DiscordLevelingSystem:
         """
         if not isinstance(member, (Member, int)): raise DiscordLevelingSystemError(f'Parameter "member" expected discord.Member or int, got {member.__class__.__name__}')
         arg = member.id if isinstance(member, Member) else member
-        query = 'SELECT * FROM leaderboard WHERE member_id = ? AND guild_id = ?' if guild else 'SELECT * FROM leaderboard WHERE member_id = ?'
+        query = DiscordLevelingSystem._QUERY_IN_GUILD if guild else DiscordLevelingSystem._QUERY_IN_ANY_GUILD
         params = (arg, guild.id) if guild else (arg,)
         
-        async with self._connection.execute(query, params) as cursor: # type: ignore
-            result = await cursor.fetchone()
-            if result: return True
-            else: return False
+        result = await self._connection.execute_fetchall(query, params) # type: ignore
+        return bool(result)
         
-    @db_file_exists
-    @leaderboard_exists
-    @verify_leaderboard_integrity
+    @db_ready
     async def get_record_count(self, guild: Optional[Guild]=None) -> int:
         """|coro|
         
@@ -1307,16 +1526,11 @@ class DiscordLevelingSystem:
                 v0.0.2
                     Added :param:`guild`
         """
-        if guild:   await self._cursor.execute('SELECT COUNT(*) from leaderboard WHERE guild_id = ?', (guild.id,)) # type: ignore
-        else:       await self._cursor.execute('SELECT COUNT(*) from leaderboard') # type: ignore
-        
-        result = await self._cursor.fetchone() # type: ignore
-        if result: return result[0]
-        else: return 0
+        if guild:   result = await self._connection.execute_fetchall('SELECT COUNT(*) from leaderboard WHERE guild_id = ?', (guild.id,)) # type: ignore
+        else:       result = await self._connection.execute_fetchall('SELECT COUNT(*) from leaderboard') # type: ignore
+        return result[0][0] # type: ignore / COUNT(*) always returns a single row
     
-    @db_file_exists
-    @leaderboard_exists
-    @verify_leaderboard_integrity
+    @db_ready
     async def next_level_up(self, member: Member) -> Optional[int]:
         """|coro|
         
@@ -1338,18 +1552,17 @@ class DiscordLevelingSystem:
         - `ImproperLeaderboard`: Leaderboard table was altered. Components changed or deleted
         - `NotConnected`: Attempted to use a method that requires a connection to a database file
         """
-        data = await self.get_data_for(member)
-        if not data:
+        record = await self._get_record(member)
+        if not record:
             return None
-        if data.level == 100:
+        _, level, xp, _ = record
+        if level == MAX_LEVEL:
             return 0
         else:
-            details = _next_level_details(data.level)
-            return details.xp_needed - data.xp # type: ignore / attr exists
+            details = _next_level_details(level)
+            return details.xp_needed - xp # type: ignore / attr exists
     
-    @db_file_exists
-    @leaderboard_exists
-    @verify_leaderboard_integrity
+    @db_ready
     async def next_level(self, member: Member) -> Optional[int]:
         """|coro|
         
@@ -1373,16 +1586,14 @@ class DiscordLevelingSystem:
         
             .. added:: v1.1.0
         """
-        data = await self.get_data_for(member)
-        if not data:
+        record = await self._get_record(member)
+        if not record:
             return None
         else:
-            next_level = data.level + 1
+            next_level = record[1] + 1
             return MAX_LEVEL if next_level > MAX_LEVEL else next_level
     
-    @db_file_exists
-    @leaderboard_exists
-    @verify_leaderboard_integrity
+    @db_ready
     async def get_xp_for(self, member: Member) -> Optional[int]:
         """|coro|
         
@@ -1404,13 +1615,11 @@ class DiscordLevelingSystem:
         - `ImproperLeaderboard`: Leaderboard table was altered. Components changed or deleted
         - `NotConnected`: Attempted to use a method that requires a connection to a database file
         """
-        md = await self.get_data_for(member)
-        if md: return md.xp
+        record = await self._get_record(member)
+        if record: return record[2]
         else: return None
     
-    @db_file_exists
-    @leaderboard_exists
-    @verify_leaderboard_integrity
+    @db_ready
     async def get_total_xp_for(self, member: Member) -> Optional[int]:
         """|coro|
         
@@ -1432,13 +1641,11 @@ class DiscordLevelingSystem:
         - `ImproperLeaderboard`: Leaderboard table was altered. Components changed or deleted
         - `NotConnected`: Attempted to use a method that requires a connection to a database file
         """
-        md = await self.get_data_for(member)
-        if md: return md.total_xp
+        record = await self._get_record(member)
+        if record: return record[3]
         else: return None
     
-    @db_file_exists
-    @leaderboard_exists
-    @verify_leaderboard_integrity
+    @db_ready
     async def get_level_for(self, member: Member) -> Optional[int]:
         """|coro|
         
@@ -1460,13 +1667,67 @@ class DiscordLevelingSystem:
         - `ImproperLeaderboard`: Leaderboard table was altered. Components changed or deleted
         - `NotConnected`: Attempted to use a method that requires a connection to a database file
         """
-        md = await self.get_data_for(member)
-        if md: return md.level
+        record = await self._get_record(member)
+        if record: return record[1]
         else: return None
     
-    @db_file_exists
-    @leaderboard_exists
-    @verify_leaderboard_integrity
+    async def _get_record(self, member: Member) -> Optional[Tuple[str, int, int, int]]:
+        """|coro|
+        
+        Get the name, level, XP, and total XP of the members record. Records that were used recently are kept in :attr:`_records`, so most of the time this doesn't need a query.
+        Used by the methods that need values from the record so they don't have to go through :meth:`get_data_for`, which also calculates the members rank
+        
+            .. added:: v1.3.0
+        """
+        key = (member.guild.id, member.id)
+        try:
+            record = self._records[key]
+        except KeyError:
+            result = await self._connection.execute_fetchall(DiscordLevelingSystem._QUERY_RECORD, (member.id, member.guild.id)) # type: ignore
+            if not result:
+                return None
+            
+            record = tuple(result[0])
+            self._keep_record(key, record) # type: ignore
+        else:
+            self._records.move_to_end(key)
+        return record # type: ignore
+    
+    def _keep_record(self, key: Tuple[int, int], record: Tuple[str, int, int, int]) -> None:
+        """Add the record to :attr:`_records`. If it's full, the record that was used the longest time ago is removed
+        
+            .. added:: v1.3.0
+        """
+        self._records[key] = record
+        self._records.move_to_end(key)
+        if len(self._records) > DiscordLevelingSystem._RECORD_CACHE_SIZE:
+            self._records.popitem(last=False)
+    
+    async def _update_member(self, member: Member, query: str, parameters: tuple) -> Optional[Tuple[str, int, int, int]]:
+        """|coro|
+        
+        Run an UPDATE (or UPSERT) query on the members record and return the updated record, or :class:`None` if they don't have a record. The updated record is returned by the
+        query itself with RETURNING, if it's not supported, the record is read again after the query
+        
+            .. added:: v1.3.0
+        """
+        key = (member.guild.id, member.id)
+        if DiscordLevelingSystem._RETURNING:
+            result = await self._connection.execute_fetchall(query + DiscordLevelingSystem._RETURNING_RECORD, parameters) # type: ignore
+            if not result:
+                return None
+            
+            record = tuple(result[0])
+            self._keep_record(key, record) # type: ignore
+            return record # type: ignore
+        else:
+            # a cursor of its own so another coroutine using :attr:`_cursor` can't change the rowcount before it's read
+            async with self._connection.execute(query, parameters) as cursor: # type: ignore
+                updated = cursor.rowcount > 0
+            self._records.pop(key, None)
+            return await self._get_record(member) if updated else None
+    
+    @db_ready
     async def get_data_for(self, member: Member) -> Optional[MemberData]:
         """|coro|
         
@@ -1487,23 +1748,25 @@ class DiscordLevelingSystem:
         - `LeaderboardNotFound`: Table "leaderboard" in the database file is missing
         - `ImproperLeaderboard`: Leaderboard table was altered. Components changed or deleted
         - `NotConnected`: Attempted to use a method that requires a connection to a database file
+
+            .. changes::
+                v1.3.0
+                    When the record isn't in :attr:`_records`, it's read together with the members rank in a single query
         """
-        async with self._connection.execute('SELECT * FROM leaderboard WHERE member_id = ? AND guild_id = ?', (member.id, member.guild.id)) as cursor: # type: ignore
-            result = await cursor.fetchone()
-            if result:
-                m_id = result[1]
-                m_name = result[2]
-                m_level = result[3]
-                m_xp = result[4]
-                m_total_xp = result[5]
-                m_rank = await self.get_rank_for(member)
-                return MemberData(m_id, m_name, m_level, m_xp, m_total_xp, m_rank)
-            else:
+        key = (member.guild.id, member.id)
+        if key in self._records:
+            m_name, m_level, m_xp, m_total_xp = await self._get_record(member) # type: ignore / the record is kept in :attr:`_records`
+            m_rank = await self.get_rank_for(member)
+        else:
+            result = await self._connection.execute_fetchall(DiscordLevelingSystem._QUERY_RECORD_RANK, (member.id, member.guild.id)) # type: ignore
+            if not result:
                 return None
+            
+            m_name, m_level, m_xp, m_total_xp, m_rank = result[0]
+            self._keep_record(key, (m_name, m_level, m_xp, m_total_xp))
+        return MemberData(member.id, m_name, m_level, m_xp, m_total_xp, m_rank)
     
-    @db_file_exists
-    @leaderboard_exists
-    @verify_leaderboard_integrity
+    @db_ready
     async def each_member_data(self, guild: Guild, sort_by: Optional[Literal['name', 'level', 'xp', 'rank']]=None, limit: Optional[int]=None) -> List[MemberData]:
         """|coro|
         
@@ -1535,74 +1798,52 @@ class DiscordLevelingSystem:
             .. changes::
                 v1.1.0
                     Added :param:`limit`
+                v1.3.0
+                    The ranks are calculated in the same query as the records
+                    When sorting by rank, :param:`limit` is applied after the records are sorted
         """
         if not isinstance(guild, Guild):
             raise DiscordLevelingSystemError(f'Parameter "guild" expected discord.Guild got {guild.__class__.__name__}')
         else:
             # NOTE: there's no need to worry about this method returning :class:`None` because as soon as someone sends a message they are added to the database
 
-            async def result_to_memberdata(query_result) -> List[MemberData]:
+            async def result_to_memberdata(query_result, apply_limit: bool=True) -> List[MemberData]:
                 """Convert the query result into a :class:`list` of :class:`MemberData` objects"""
-                data = []
-                for m_id, m_name, m_level, m_xp, m_total_xp in query_result:
-                    rank = None
-                    member = guild.get_member(m_id)
-                    if member:
-                        rank = await self.get_rank_for(member) # if the member is None (no longer in guild), rank will be None. This is intentional
-                    data.append(MemberData(m_id, m_name, m_level, m_xp, m_total_xp, rank))
-                return data if limit is None else data[:limit]
-
-            if not sort_by:
-                result = await self._connection.execute_fetchall('SELECT member_id, member_name, member_level, member_xp, member_total_xp FROM leaderboard WHERE guild_id = ?', (guild.id,)) # type: ignore
-                return await result_to_memberdata(result)
-            else:
-                sort_by = sort_by.lower() # type: ignore
-                if sort_by in ('name', 'level', 'xp', 'rank'):
-                    if sort_by == 'name':
-                        result = await self._connection.execute_fetchall('SELECT member_id, member_name, member_level, member_xp, member_total_xp FROM leaderboard WHERE guild_id = ? ORDER BY member_name COLLATE NOCASE', (guild.id,)) # type: ignore
-                        return await result_to_memberdata(result)
-                    
-                    elif sort_by == 'level':
-                        result = await self._connection.execute_fetchall('SELECT member_id, member_name, member_level, member_xp, member_total_xp FROM leaderboard WHERE guild_id = ? ORDER BY member_level DESC', (guild.id,)) # type: ignore
-                        return await result_to_memberdata(result)
-                    
-                    elif sort_by == 'xp':
-                        result = await self._connection.execute_fetchall('SELECT member_id, member_name, member_level, member_xp, member_total_xp FROM leaderboard WHERE guild_id = ? ORDER BY member_total_xp DESC', (guild.id,)) # type: ignore
-                        return await result_to_memberdata(result)
-
-                    elif sort_by == 'rank':
-                        def convert(md: MemberData) -> MemberData:
-                            """Set the rank to an :class:`int` value of 0 because it is not possible to sort a list of :class:`int` that has :class:`None` values"""
-                            if md.rank is None:
-                                md.rank = 0
-                            return md
-                        
-                        result = await self._connection.execute_fetchall('SELECT member_id, member_name, member_level, member_xp, member_total_xp FROM leaderboard WHERE guild_id = ?', (guild.id,)) # type: ignore
-                        all_data: List[MemberData] = await result_to_memberdata(result)
-                        
-                        converted = [convert(md) for md in all_data] # convert the data so it can be sorted properly
-                        sorted_converted = sorted(converted, key=lambda md: md.rank) # type: ignore
-
-                        no_rank = [md for md in sorted_converted if md.rank == 0]
-                        with_rank = [md for md in sorted_converted if md.rank != 0]
-                        pre_final = with_rank + no_rank
-    
-                        def zero_to_none(md: MemberData) -> MemberData:
-                            """If they're not in the guild anymore, I don't want their rank to be presented as zero because that implies they are still in the guild, but just has
-                            a rank of zero. Setting it back to :class:`None` makes it more readable and draws further implication that they're no longer in the guild
-                            """
-                            if md.rank == 0:
-                                md.rank = None
-                            return md
-                        
-                        final = [zero_to_none(md) for md in pre_final]
-                        return final
+                # only the records that will be returned are converted
+                if apply_limit and limit is not None:
+                    query_result = query_result[:limit]
+                
+                # if the member is None (no longer in guild), rank will be None. This is intentional
+                get_member = guild.get_member
+                if DiscordLevelingSystem._WINDOW_FUNCTIONS:
+                    return [MemberData(m_id, m_name, m_level, m_xp, m_total_xp, m_rank if get_member(m_id) else None) for m_id, m_name, m_level, m_xp, m_total_xp, m_rank in query_result]
                 else:
-                    raise DiscordLevelingSystemError(f'Parameter "sort_by" expected "name", "level", "xp", or "rank", {sort_by!r} was not recognized')
+                    data = []
+                    for m_id, m_name, m_level, m_xp, m_total_xp, _ in query_result:
+                        member = get_member(m_id)
+                        rank = await self.get_rank_for(member) if member else None
+                        data.append(MemberData(m_id, m_name, m_level, m_xp, m_total_xp, rank))
+                    return data
+
+            sort_by = sort_by.lower() if sort_by else None # type: ignore
+            try:
+                query = DiscordLevelingSystem._EACH_MEMBER_DATA_QUERIES[sort_by]
+            except KeyError:
+                raise DiscordLevelingSystemError(f'Parameter "sort_by" expected "name", "level", "xp", or "rank", {sort_by!r} was not recognized')
+            
+            result = await self._connection.execute_fetchall(query, (guild.id,)) # type: ignore
+            if sort_by == 'rank':
+                # the records are already in the order of their rank. Members that are no longer in the guild don't have a rank, so they're moved to the end
+                all_data: List[MemberData] = await result_to_memberdata(result, apply_limit=False)
+                
+                with_rank = [md for md in all_data if md.rank is not None]
+                no_rank = [md for md in all_data if md.rank is None]
+                final = with_rank + no_rank
+                return final if limit is None else final[:limit]
+            else:
+                return await result_to_memberdata(result)
     
-    @db_file_exists
-    @leaderboard_exists
-    @verify_leaderboard_integrity
+    @db_ready
     async def get_rank_for(self, member: Member) -> Optional[int]:
         """|coro|
         
@@ -1624,17 +1865,10 @@ class DiscordLevelingSystem:
         - `ImproperLeaderboard`: Leaderboard table was altered. Components changed or deleted
         - `NotConnected`: Attempted to use a method that requires a connection to a database file
         """
-        result = await self._connection.execute_fetchall('SELECT member_id FROM leaderboard WHERE guild_id = ? ORDER BY member_total_xp DESC', (member.guild.id,)) # type: ignore
-        all_ids = [m_id[0] for m_id in result]
-        try:
-            rank = all_ids.index(member.id) + 1
-            return rank
-        except ValueError:
-            return None
+        result = await self._connection.execute_fetchall(DiscordLevelingSystem._QUERY_RANK, (member.id, member.guild.id)) # type: ignore
+        return result[0][0] if result else None
     
-    @db_file_exists
-    @leaderboard_exists
-    @verify_leaderboard_integrity
+    @db_ready
     async def sql_query_get(self, sql: str, parameters: Optional[Tuple[Union[str, int]]]=None, fetch: Union[str, int]='ALL') -> Union[List[tuple], tuple]:
         """|coro|
         
@@ -1677,54 +1911,30 @@ class DiscordLevelingSystem:
         - `DiscordLevelingSystemError`: Argument "fetch" was the wrong type or used an invalid value
         - `aiosqlite.Error`: Base aiosqlite error. Multiple errors can arise from this if the SQL query was invalid
         """
-        if isinstance(fetch, str):
-            fetch = fetch.upper()
-            if fetch in ('ALL', 'ONE'):
-                async with self._connection.execute(sql, parameters) as cursor: # type: ignore
-                    if fetch == 'ALL':
-                        return await cursor.fetchall() # type: ignore
-                    elif fetch == 'ONE':
-                        return await cursor.fetchone() # type: ignore
-            else:
-                raise DiscordLevelingSystemError(f'Fetch {fetch!r} not recognized')
-        elif isinstance(fetch, int):
-            if fetch > 0:
-                async with self._connection.execute(sql, parameters) as cursor: # type: ignore
-                    return await cursor.fetchmany(fetch) # type: ignore
+        # the query could be changing records, so none of the kept records can be trusted anymore. They're cleared again once it's done because
+        # a record that was already being read before the query ran would be kept with its old values
+        self._records.clear()
+        try:
+            if isinstance(fetch, str):
+                fetch = fetch.upper()
+                if fetch in ('ALL', 'ONE'):
+                    async with self._connection.execute(sql, parameters) as cursor: # type: ignore
+                        if fetch == 'ALL':
+                            return await cursor.fetchall() # type: ignore
+                        elif fetch == 'ONE':
+                            return await cursor.fetchone() # type: ignore
+                else:
+                    raise DiscordLevelingSystemError(f'Fetch {fetch!r} not recognized')
+            elif isinstance(fetch, int):
+                if fetch > 0:
+                    async with self._connection.execute(sql, parameters) as cursor: # type: ignore
+                        return await cursor.fetchmany(fetch) # type: ignore
+                else:
+                    raise DiscordLevelingSystemError('Argument "fetch" must be greater than zero')
             else:
-                raise DiscordLevelingSystemError('Argument "fetch" must be greater than zero')
-        else:
-            raise DiscordLevelingSystemError(f'Argument "fetch" needs to be str or int, got {fetch.__class__.__name__}')
-    
-    def _get_last_award(self, current_award: RoleAward, guild_awards: List[RoleAward]) -> RoleAward:
-        """Get the last :class:`RoleAward` that was given to the member. Returns the current :class:`RoleAward` if the last award is the current one
-        
-            .. changes::
-                v0.0.2
-                    Added :param:`guild_awards`
-        """
-        current_award_idx = guild_awards.index(current_award)
-        last_award_idx = guild_awards.index(current_award) - 1
-        if last_award_idx < 0:
-            last_award_idx = current_award_idx
-
-        if last_award_idx == current_award_idx:
-            return current_award
-        else:
-            return guild_awards[last_award_idx]
-    
-    async def _refresh_name(self, message: Message) -> None:
-        """|coro| If the members current database name doesn't match the name that's on discord, update the name in the database
-
-            .. NOTE
-                This is called AFTER we update or insert a new member into the database from :meth:`award_xp`, so :meth:`fetchone` will always return something
-        """
-        async with self._connection.execute('SELECT member_name FROM leaderboard WHERE member_id = ? AND guild_id = ?', (message.author.id, message.author.guild.id)) as cursor: # type: ignore
-            data = await cursor.fetchone()
-            database_name = data[0] # type: ignore / will always have a value because as *soon* as a member sends a message, the database is updated to contain a value to fetch
-            if database_name != str(message.author):
-                await cursor.execute('UPDATE leaderboard SET member_name = ? WHERE member_id = ? AND guild_id = ?', (str(message.author), message.author.id, message.author.guild.id)) # type: ignore
-                await self._connection.commit() # type: ignore
+                raise DiscordLevelingSystemError(f'Argument "fetch" needs to be str or int, got {fetch.__class__.__name__}')
+        finally:
+            self._records.clear()
     
     async def _handle_level_up(self, message: Message, md: MemberData, leveled_up: bool) -> None:
         """|coro| Gives/removes roles from members that leveled up and met the :class:`RoleAward` requirement. This also sends the level up message
@@ -1741,6 +1951,9 @@ class DiscordLevelingSystem:
                     Removed raising of exception (LevelUpChannelNotFound) to support multi-guild level up channel IDs
                 v1.0.2
                     Added handling for event `on_dls_level_up`
+                v1.3.0
+                    The role award for the level is looked up in :attr:`_level_awards` instead of searching the guild's awards
+                    When not stacking awards, the previous award is only looked up in the guild when it's a different award
         """
         if leveled_up:
             member: Member = message.author # type: ignore / `.author` will be :class:`discord.Member` (lib doesn't work in DMs)
@@ -1785,17 +1998,16 @@ class DiscordLevelingSystem:
                     await send_announcement(announcement_message, message.channel, lua._send_kwargs)
             
             # check if there is a role award for the new level, if so, apply it
-            if self._awards:
+            if self._level_awards:
                 try:
-                    # get the list of RoleAwards that match the guild ID
-                    guild_role_awards: List[RoleAward] = self._awards[message.guild.id] # type: ignore / `.guild` will always be :class:`discord.Guild`
+                    # get the RoleAwards that match the guild ID
+                    guild_level_awards = self._level_awards[message.guild.id] # type: ignore / `.guild` will always be :class:`discord.Guild`
                 except KeyError:
                     return
                 else:
                     # get the role award that matches the level up
-                    role_award = [ra for ra in guild_role_awards if ra.level_requirement == md.level]
-                    if role_award:
-                        role_award = role_award[0]
+                    if md.level in guild_level_awards:
+                        role_award, last_award = guild_level_awards[md.level]
                         if self.stack_awards:
                             role_obj: Optional[Role] = role_exists(award=role_award)
                             if role_obj:
@@ -1803,9 +2015,8 @@ class DiscordLevelingSystem:
                             else:
                                 return
                         else:
-                            last_award: RoleAward = self._get_last_award(role_award, guild_role_awards)
-                            role_to_remove: Optional[Role] = role_exists(award=last_award)
                             role_to_add: Optional[Role] = role_exists(award=role_award)
+                            role_to_remove: Optional[Role] = role_to_add if last_award == role_award else role_exists(award=last_award)
                             
                             # Note: Don't use an exception here because of multi-guild support
                             if not role_to_remove or not role_to_add:
@@ -1814,6 +2025,7 @@ class DiscordLevelingSystem:
                             if last_award == role_award:
                                 await member.add_roles(role_to_add)
                             else:
+                                # each call only changes its own role, so roles given to the member by anything else at the same time are kept
                                 await member.add_roles(role_to_add)
                                 await member.remove_roles(role_to_remove)
             
@@ -1869,9 +2081,7 @@ class DiscordLevelingSystem:
     async def award_xp(self, *, amount: Sequence[int]=[15, 25], message: Message, refresh_name: bool=True, **kwargs) -> None:
         ...
     
-    @db_file_exists
-    @leaderboard_exists
-    @verify_leaderboard_integrity
+    @db_ready
     async def award_xp(self, *, amount: Union[int, Sequence[int]]=[15, 25], message: Message, refresh_name: bool=True, **kwargs) -> None:
         """|coro|
         
@@ -1908,64 +2118,67 @@ class DiscordLevelingSystem:
                     Added initialization for :attr:`_message_author`
                     Replaced query with class attr
                     Moved the detection of a level up from :meth:`_handle_level_up` to here
+                v1.3.0
+                    The name is refreshed in the same query that adds the XP
+                    New and existing members are handled by a single UPSERT query that returns the updated record
+                    The members rank is only calculated when they level up
+                    The bonus roles are checked against the members role IDs instead of looking up each bonus role in the guild
         """
-        if any([message.guild is None, self._determine_no_xp(message), message.author.bot, message.type != MessageType.default, self.active is False]):
+        # the cheapest checks go first, and the no XP check is only done for guild messages
+        if self.active is False or message.guild is None or message.author.bot or message.type != MessageType.default or self._determine_no_xp(message):
             return
         else:
-            self._handle_amount_param(arg=amount)
-            if isinstance(amount, Sequence):
-                amount = random.randint(amount[0], amount[1])
-            
-            # bonus XP
-            bonus: Optional[DiscordLevelingSystem.Bonus] = kwargs.get('bonus')
-            if bonus:
-                for role_id in bonus.role_ids:
-                    role: Optional[Role] = message.guild.get_role(role_id) # type: ignore
-                    if role in message.author.roles: # type: ignore / This lib cannot operate with :class:`discord.User` (DM's). It will always be :class:`discord.Member`
-                        if bonus.multiply:
-                            amount *= bonus.bonus_amount
-                        else:
-                            amount += bonus.bonus_amount
-                        
-                        if amount > 75: # type: ignore
-                            amount = 75
-                        break
-            
+            # most messages are sent while the member is on cooldown, so that's checked before the amount is calculated
             bucket = self._cooldown.get_bucket(message)
             on_cooldown = bucket.update_rate_limit() # type: ignore
 
             if not on_cooldown:
+                self._handle_amount_param(arg=amount)
+                if isinstance(amount, Sequence):
+                    amount = random.randint(amount[0], amount[1])
+            
+                # bonus XP
+                bonus: Optional[DiscordLevelingSystem.Bonus] = kwargs.get('bonus')
+                # the member only needs one of the bonus roles. Their roles all belong to the guild, so there's no need to look up each bonus role in it
+                if bonus and not bonus._role_id_set.isdisjoint(role.id for role in message.author.roles): # type: ignore / This lib cannot operate with :class:`discord.User` (DM's). It will always be :class:`discord.Member`
+                    if bonus.multiply:
+                        amount *= bonus.bonus_amount
+                    else:
+                        amount += bonus.bonus_amount
+                
+                    if amount > 75: # type: ignore
+                        amount = 75
+
                 member = message.author
                 self._message_author = member # type: ignore
-                async with self._connection.execute('SELECT * FROM leaderboard WHERE member_id = ? AND guild_id = ?', (member.id, member.guild.id)) as cursor: # type: ignore
-                    record = await cursor.fetchone()
-                    member_level_up = False
-                    if record:
-                        # update the database with the new amount
-                        query = """
-                            UPDATE leaderboard
-                            SET member_xp = member_xp + ?, member_total_xp = member_total_xp + ?
-                            WHERE member_id = ? AND guild_id = ?
-                        """
-                        await cursor.execute(query, (amount, amount, member.id, member.guild.id)) # type: ignore
-                        await self._connection.commit() # type: ignore
-
-                        # get the updated member data (level is not updated yet)
-                        md = await self.get_data_for(member) # type: ignore
-
-                        next_details = _next_level_details(md.level) # type: ignore
-                        if md.xp >= next_details.xp_needed and md.level < next_details.level: # type: ignore
-                            # update the database with the new level and reset the current XP count
-                            await cursor.execute('UPDATE leaderboard SET member_level = ?, member_xp = ? WHERE member_id = ? AND guild_id = ?', (next_details.level, 0, member.id, member.guild.id)) # type: ignore
-                            await self._connection.commit() # type: ignore
-                            member_level_up = True
-
-                        md = await self.get_data_for(member) # type: ignore
-                        await self._handle_level_up(message, md, leveled_up=member_level_up) # type: ignore
-
+                member_name = str(member)
+                if self._unique_members and DiscordLevelingSystem._UPSERT:
+                    # new and existing members are handled by the same query, so messages from a new member that are processed at the same time can't add them twice
+                    record = await self._update_member(member, DiscordLevelingSystem._QUERY_AWARD_XP, (member.guild.id, member.id, member_name, amount, amount, refresh_name))
+                else:
+                    # members that are already in the database (almost every message) only need the UPDATE, which also refreshes their name. A new member is inserted when the UPDATE didn't find them
+                    record = await self._update_member(member, DiscordLevelingSystem._QUERY_ADD_XP, (member_name if refresh_name else None, amount, amount, member.id, member.guild.id))
+                
+                if record is None:
+                    async with self._connection.execute(DiscordLevelingSystem._QUERY_NEW_MEMBER, (member.guild.id, member.id, member_name, 0, amount, amount)) as cursor: # type: ignore
+                        inserted = cursor.rowcount > 0
+                    
+                    # another message from the same member added them after the UPDATE above didn't find them, so the XP is added to that record
+                    if inserted:
+                        record = (member_name, 0, amount, amount)
                     else:
-                        await cursor.execute(DiscordLevelingSystem._QUERY_NEW_MEMBER, (member.guild.id, member.id, str(member), 0, amount, amount)) # type: ignore
-                        await self._connection.commit() # type: ignore
-
-                    if refresh_name:
-                        await self._refresh_name(message)
+                        record = await self._update_member(member, DiscordLevelingSystem._QUERY_ADD_XP, (member_name if refresh_name else None, amount, amount, member.id, member.guild.id))
+                
+                # the changes aren't committed yet, but this connection can already see them
+                m_name, m_level, m_xp, m_total_xp = record
+                next_details = _next_level_details(m_level)
+                if m_xp >= next_details.xp_needed and m_level < next_details.level: # type: ignore
+                    # update the database with the new level and reset the current XP count
+                    m_name, m_level, m_xp, m_total_xp = await self._update_member(member, DiscordLevelingSystem._QUERY_LEVEL_UP, (next_details.level, member.id, member.guild.id)) # type: ignore / the record exists
+                    await self._connection.commit() # type: ignore / the XP and the level up are saved together
+                    
+                    # the rank is only needed for the level up, so it's only calculated here
+                    md = MemberData(member.id, m_name, m_level, m_xp, m_total_xp, await self.get_rank_for(member))
+                    await self._handle_level_up(message, md, leveled_up=True)
+                else:
+                    await self._connection.commit() # type: ignore
@@ -5,6 +5,7 @@ All credit goes towards the MEE6 developers for providing the "LEVELS_AND_XP" do
 MEE6 documentation can be found here: https://github.com/Mee6/Mee6-documentation
 """
 
+from bisect import bisect_right
 from collections import namedtuple
 from typing import Final, NamedTuple
 
@@ -117,6 +118,14 @@ LEVELS_AND_XP: Final = {
 MAX_XP: Final = LEVELS_AND_XP['100']
 MAX_LEVEL: Final = 100
 
+# the XP needed for each level, indexed by the level
+_XP_NEEDED: Final = tuple(LEVELS_AND_XP[str(level)] for level in range(MAX_LEVEL + 1))
+
+_Details = namedtuple('Details', ['level', 'xp_needed'])
+
+# the details of the level after each level, indexed by the current level. Level 100 points to itself
+_NEXT_LEVEL_DETAILS: Final = tuple(_Details(level=min(level + 1, MAX_LEVEL), xp_needed=LEVELS_AND_XP[str(min(level + 1, MAX_LEVEL))]) for level in range(MAX_LEVEL + 1))
+
 def _next_level_details(current_level: int) -> NamedTuple:
     """Returns a `namedtuple`
     
@@ -128,32 +137,21 @@ def _next_level_details(current_level: int) -> NamedTuple:
         .. changes
             v0.0.2
                 Changed return type to a namedtuple instead of tuple
+            v1.3.0
+                The details for each level are built once when the module is imported
     """
-    temp = current_level + 1
-    if temp > 100:
-        temp = 100
-    key = str(temp)
-    val = LEVELS_AND_XP[key]
-    Details = namedtuple('Details', ['level', 'xp_needed'])
-    return Details(level=int(key), xp_needed=val)
+    return _NEXT_LEVEL_DETAILS[min(current_level, MAX_LEVEL)]
 
-def _find_level(current_total_xp: int) -> int: # type: ignore / this WILL return an `int` unless the user intentionally changed the values by altering the code 
+def _find_level(current_total_xp: int) -> int:
     """Return the members current level based on their total XP
 
     NOTE: Do not use this with detecting level ups in :meth:`award_xp`. Pretty much only made for :meth:`add_xp`, :meth:`remove_xp`
     
         .. added:: v0.0.2
+
+        .. changes::
+            v1.3.0
+                The level is found with a binary search of the XP needed for each level instead of checking every level
     """
-    # check if the current xp matches the xp_needed exactly
-    if current_total_xp in LEVELS_AND_XP.values():
-        for level, xp_needed in LEVELS_AND_XP.items():
-            if current_total_xp == xp_needed:
-                return int(level)
-    else:
-        for level, xp_needed in LEVELS_AND_XP.items():
-            if 0 <= current_total_xp <= xp_needed:
-                level = int(level)
-                level -= 1
-                if level < 0:
-                    level = 0
-                return level
+    # the XP needed for each level only goes up, so the level is the last one that needs no more XP than the member has
+    return max(bisect_right(_XP_NEEDED, current_total_xp) - 1, 0)
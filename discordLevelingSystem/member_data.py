@@ -22,7 +22,8 @@ FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
 DEALINGS IN THE SOFTWARE.
 """
 
-from typing import Dict, Optional, Union
+from operator import attrgetter
+from typing import ClassVar, Dict, Optional, Union
 
 class MemberData:
     """Represents a members record from the database converted to an object where each value from their record can be easily accessed. Used in coordination with :class:`DiscordLevelingSystem`
@@ -52,6 +53,7 @@ class MemberData:
     """
 
     __slots__ = ('id_number', 'name', 'level', 'xp', 'total_xp', 'rank', 'mention')
+    _get_values: ClassVar[attrgetter] = attrgetter(*__slots__) # used by :meth:`to_dict`
 
     def __init__(self, id_number: int, name: str, level: int, xp: int, total_xp: int, rank: Optional[int]):
         self.id_number = id_number
@@ -73,5 +75,8 @@ class MemberData:
         Dict[:class:`str`, Union[:class:`int`, :class:`str`]]
 
             .. added:: v1.0.1
+            .. changes::
+                v1.3.0
+                    All values are retrieved at once with :func:`operator.attrgetter`
         """
-        return {key : getattr(self, key) for key in self.__class__.__slots__}
+        return dict(zip(MemberData.__slots__, MemberData._get_values(self)))